@@ -0,0 +1,197 @@
+"""
+CV arşivini toplu olarak parse eden komut satırı aracı.
+
+    python -m cv_job_matcher.batch_ingest /path/to/cvs --out corpus.jsonl
+    python -m cv_job_matcher.batch_ingest /path/to/cvs --format parquet --out corpus_parquet/
+
+Dosyalar tüm çekirdeklerde paralel parse edilir (model her worker'da bir kez yüklenir),
+sonuçlar parça parça yazılır ve işlenen içerik hash'leri checkpoint dosyasına eklenir;
+yarıda kalan bir çalıştırma aynı komutla kaldığı yerden devam eder.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from typing import Iterator, Optional, Set
+from cv_job_matcher.parsers.cv_parser import parse_cv, detect_filetype, SECTION_HEADERS
+from cv_job_matcher.matching.vector_index import embed_sections, get_cv_vector_index
+from cv_job_matcher.parsers.header_classifier import get_header_classifier
+from cv_job_matcher.utils.model_registry import warmup_model
+from cv_job_matcher.utils.parse_cache import file_digest
+
+logger = logging.getLogger("cv_job_matcher.batch_ingest")
+
+_done_hashes: Set[str] = set()
+_use_cache = False
+_embed = False
+_pdf_workers: Optional[int] = None
+
+def iter_cv_files(root: str) -> Iterator[str]:
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            try:
+                detect_filetype(path)
+            except ValueError:
+                logger.info("Skipping unsupported file %s", path)
+                continue
+            yield path
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+def _init_worker(done_hashes: Set[str], use_cache: bool, embed: bool = False,
+                 pdf_workers: Optional[int] = None) -> None:
+    global _done_hashes, _use_cache, _embed, _pdf_workers
+    _done_hashes = done_hashes
+    _use_cache = use_cache
+    _embed = embed
+    _pdf_workers = pdf_workers
+    # Model (dummy encode dahil) ve başlık embedding'leri worker başına bir kez yüklenir
+    warmup_model()
+    get_header_classifier('cv', SECTION_HEADERS).header_embeddings()
+
+def _parse_file(path: str):
+    try:
+        digest = file_digest(path)
+        if digest in _done_hashes:
+            return "skipped", path, digest
+        result = parse_cv(path, content_hash=digest, use_cache=_use_cache, pdf_workers=_pdf_workers)
+        if _embed:
+            # Embedding worker'da hesaplanır, ana süreç sadece indekse ekler
+            result["vectors"] = embed_sections(result["sections"])
+        return "ok", path, result
+    except Exception as e:
+        return "error", path, f"{type(e).__name__}: {e}"
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, 'a', encoding='utf-8')
+
+    def write(self, record: dict) -> None:
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        self._f.close()
+
+class ParquetWriter:
+    """
+    Her flush'ta out dizinine yeni bir part dosyası yazar; böylece önceki
+    çalıştırmaların dosyalarına dokunmadan devam edilebilir.
+    """
+
+    def __init__(self, directory: str):
+        import pyarrow  # noqa: F401  (eksikse erken hata ver)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._rows = []
+
+    def write(self, record: dict) -> None:
+        record = dict(record, sections=json.dumps(record["sections"], ensure_ascii=False))
+        self._rows.append(record)
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pylist(self._rows)
+        name = f"part-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{time.monotonic_ns()}.parquet"
+        pq.write_table(table, os.path.join(self.directory, name))
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+
+def ingest(root: str, out: str, fmt: str = "jsonl", checkpoint: Optional[str] = None, workers: Optional[int] = None,
+           batch_size: int = 100, use_cache: bool = False, report_every: float = 10.0, build_index: bool = False) -> dict:
+    checkpoint = checkpoint or (out.rstrip('/\\') + ".checkpoint")
+    done = load_checkpoint(checkpoint)
+    writer = ParquetWriter(out) if fmt == "parquet" else JsonlWriter(out)
+    stats = {"parsed": 0, "skipped": 0, "errors": 0}
+    pending_hashes = []
+    started = last_report = time.monotonic()
+    workers = workers or os.cpu_count() or 1
+    index = get_cv_vector_index() if build_index else None
+
+    def flush():
+        # Checkpoint sadece kayıtlar diske yazıldıktan sonra güncellenir
+        writer.flush()
+        if pending_hashes:
+            with open(checkpoint, 'a', encoding='utf-8') as f:
+                f.write("\n".join(pending_hashes) + "\n")
+            pending_hashes.clear()
+
+    if workers == 1:
+        # Tek worker: süreç açılmadan aynı süreçte parse edilir (PDF sayfa paralelliği config'ten)
+        pool = None
+        _init_worker(done, use_cache, build_index)
+        results = map(_parse_file, iter_cv_files(root))
+    else:
+        # Pool worker'ları daemon süreçlerdir, alt süreç açamazlar; paralellik dosya düzeyinde
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(done, use_cache, build_index, 0))
+        results = pool.imap_unordered(_parse_file, iter_cv_files(root), chunksize=4)
+    with pool if pool is not None else contextlib.nullcontext():
+        try:
+            for status, path, value in results:
+                digest = value if status == "skipped" else None if status == "error" else value["cv_id"]
+                if status == "error":
+                    stats["errors"] += 1
+                    logger.warning("Failed to parse %s: %s", path, value)
+                elif status == "skipped" or digest in done:
+                    # Checkpoint'te var ya da bu çalıştırmada aynı içerikli bir dosya işlendi
+                    stats["skipped"] += 1
+                else:
+                    writer.write({"cv_id": digest, "path": path, "raw_text": value["raw_text"],
+                                  "sections": value["sections"]})
+                    if index is not None:
+                        index.add(digest, *value["vectors"])
+                    done.add(digest)
+                    pending_hashes.append(digest)
+                    stats["parsed"] += 1
+                    if len(pending_hashes) >= batch_size:
+                        flush()
+                now = time.monotonic()
+                if now - last_report >= report_every:
+                    last_report = now
+                    logger.info("%d parsed, %d skipped, %d errors, %.1f files/sec",
+                                stats["parsed"], stats["skipped"], stats["errors"], stats["parsed"] / max(now - started, 1e-9))
+        finally:
+            flush()
+            writer.close()
+    elapsed = time.monotonic() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["files_per_sec"] = round(stats["parsed"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a directory of CVs into a JSONL or Parquet corpus.")
+    parser.add_argument("root", help="Directory to scan recursively for .pdf/.docx/.txt files")
+    parser.add_argument("--out", required=True, help="Output .jsonl file, or output directory for parquet")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    parser.add_argument("--checkpoint", help="File of already processed content hashes (default: <out>.checkpoint)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores; 1 parses in-process)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Records per flush/checkpoint")
+    parser.add_argument("--use-cache", action="store_true", help="Also read/write the shared parse cache")
+    parser.add_argument("--index", action="store_true",
+                        help="Also add CV embeddings to the vector index used by /search (CVM_VECTOR_INDEX_DIR)")
+    parser.add_argument("--report-every", type=float, default=10.0, help="Progress log interval in seconds")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    stats = ingest(args.root, args.out, args.format, args.checkpoint, args.workers,
+                   args.batch_size, args.use_cache, args.report_every, args.index)
+    logger.info("Done: %s", json.dumps(stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+
+# Ortam değişkenleri ile değiştirilebilen uygulama ayarları
+
+# Sentence transformer modeli (CV ve iş ilanı parser'ları ortak kullanır)
+EMBEDDING_MODEL_NAME = os.getenv("CVM_EMBEDDING_MODEL", "paraphrase-MiniLM-L6-v2")
+# "cpu", "cuda", "mps" ... boş bırakılırsa sentence_transformers kendisi seçer
+EMBEDDING_DEVICE = os.getenv("CVM_EMBEDDING_DEVICE") or None
+# Uygulama açılırken modeli yükle (False ise ilk istekte yüklenir)
+PRELOAD_MODELS = os.getenv("CVM_PRELOAD_MODELS", "1") == "1"
+
+# Parse önbelleği: bellekteki LRU kayıt sayısı ve kalıcı SQLite dosyası (boş ise sadece bellek)
+PARSE_CACHE_ENABLED = os.getenv("CVM_PARSE_CACHE", "1") == "1"
+PARSE_CACHE_SIZE = int(os.getenv("CVM_PARSE_CACHE_SIZE", "256"))
+PARSE_CACHE_DB = os.getenv("CVM_PARSE_CACHE_DB", "cache/parse_cache.db")
+
+# Gemini istemcisi
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+GEMINI_BASE_URL = os.getenv("CVM_GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = os.getenv("CVM_GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("CVM_GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.getenv("CVM_GEMINI_READ_TIMEOUT", "60"))
+# 429/5xx ve bağlantı hatalarında yeniden deneme sayısı ve üstel bekleme sınırları (saniye)
+GEMINI_MAX_RETRIES = int(os.getenv("CVM_GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE = float(os.getenv("CVM_GEMINI_BACKOFF_BASE", "0.5"))
+GEMINI_BACKOFF_MAX = float(os.getenv("CVM_GEMINI_BACKOFF_MAX", "8"))
+# Aynı anda Gemini'ye gidebilecek en fazla istek ve bağlantı havuzu boyutu
+GEMINI_MAX_CONCURRENCY = int(os.getenv("CVM_GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("CVM_GEMINI_MAX_CONNECTIONS", "32"))
+
+# Gemini yanıt önbelleği (TTL saniye). Kalıcı SQLite dosyası isteğe bağlıdır.
+LLM_CACHE_ENABLED = os.getenv("CVM_LLM_CACHE", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("CVM_LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("CVM_LLM_CACHE_TTL", "86400"))
+LLM_CACHE_DB = os.getenv("CVM_LLM_CACHE_DB", "")
+
+# Sıralama havuzu (/rank): süreç belleğinde tutulur, yeniden başlatınca boşalır ve istenen CV'ler
+# parse önbelleğinden geri yüklenir. En fazla CV sayısı aşılınca en eskiler çıkarılır (0 = sınırsız)
+CORPUS_MAX_CVS = int(os.getenv("CVM_CORPUS_MAX_CVS", "100000"))
+
+# Kompakt prompt: sadece ilgili anahtar kelimeler ve bölümler, token bütçesi ile (0 = sınırsız).
+# Gemini'ye giden içeriği değiştirdiği için varsayılan olarak kapalıdır
+PROMPT_COMPACT = os.getenv("CVM_PROMPT_COMPACT", "0") == "1"
+PROMPT_TOKEN_BUDGET = int(os.getenv("CVM_PROMPT_TOKEN_BUDGET", "6000"))
+
+# Eşleştirme modu: "llm" (her istek Gemini'ye gider) veya "cascade" (önce yerel puan)
+MATCH_MODE = os.getenv("CVM_MATCH_MODE", "llm")
+# Cascade modunda yerel puan oranı (puan / en yüksek puan) bu değerin altındaysa LLM çağrılmaz
+CASCADE_MIN_SCORE = float(os.getenv("CVM_CASCADE_MIN_SCORE", "0.3"))
+
+# Yüklemeler: en büyük dosya boyutu ve okuma parçası (byte)
+UPLOAD_DIR = os.getenv("CVM_UPLOAD_DIR", "uploads")
+UPLOAD_MAX_BYTES = int(os.getenv("CVM_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("CVM_UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+# CV/ilan parse işlemleri için worker havuzu: "thread" veya "process", worker sayısı ve bekleme kuyruğu
+PARSE_POOL_KIND = os.getenv("CVM_PARSE_POOL_KIND", "thread")
+PARSE_WORKERS = int(os.getenv("CVM_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_QUEUE_SIZE = int(os.getenv("CVM_PARSE_QUEUE_SIZE", "16"))
+
+# PDF metin çıkarımı: backend ("pdfplumber" veya daha hızlı, sadece metin çıkaran "pypdfium2"),
+# en fazla işlenecek sayfa (0 = sınırsız), sayfa paralelliği için process sayısı ve eşik sayfa sayısı
+PDF_BACKEND = os.getenv("CVM_PDF_BACKEND", "pdfplumber")
+PDF_MAX_PAGES = int(os.getenv("CVM_PDF_MAX_PAGES", "50"))
+PDF_WORKERS = int(os.getenv("CVM_PDF_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("CVM_PDF_PARALLEL_MIN_PAGES", "8"))
+
+# Anahtar kelime motoru: "lexical" (bulanık string eşleşmesi) veya "embedding" (anlamsal benzerlik).
+# Embedding modunda KEYWORDS matrisi bu dizine .npy olarak yazılır (boş ise sadece bellekte tutulur).
+SKILL_ENGINE = os.getenv("CVM_SKILL_ENGINE", "lexical")
+SKILL_SIMILARITY_THRESHOLD = float(os.getenv("CVM_SKILL_SIMILARITY_THRESHOLD", "0.75"))
+SKILL_MATRIX_DIR = os.getenv("CVM_SKILL_MATRIX_DIR", "cache")
+
+# CV vektör indeksi: yüklenen CV'lerin doküman/bölüm embedding'leri bu dizinde append-only saklanır.
+# Satır sayısı IVF_MIN_ROWS'a ulaşınca kümeli (IVF) aramaya geçilir; NPROBE taranan küme sayısıdır.
+VECTOR_INDEX_ENABLED = os.getenv("CVM_VECTOR_INDEX", "1") == "1"
+VECTOR_INDEX_DIR = os.getenv("CVM_VECTOR_INDEX_DIR", "cache/vector_index")
+VECTOR_IVF_MIN_ROWS = int(os.getenv("CVM_VECTOR_IVF_MIN_ROWS", "20000"))
+VECTOR_IVF_NPROBE = int(os.getenv("CVM_VECTOR_IVF_NPROBE", "8"))
+
+# Metrikler: aşama süreleri, sayaçlar ve /metrics (0 ise ölçüm yapılmaz).
+# SLOW_REQUEST_SECONDS'u aşan istekler aşama dökümüyle loglanır (0 = kapalı).
+METRICS_ENABLED = os.getenv("CVM_METRICS", "1") == "1"
+SLOW_REQUEST_SECONDS = float(os.getenv("CVM_SLOW_REQUEST_SECONDS", "2"))
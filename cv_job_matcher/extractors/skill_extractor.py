@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+from cv_job_matcher import config
+from cv_job_matcher.utils.metrics import span
+from cv_job_matcher.utils.model_registry import get_model
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+# matcher.tokenize_section ile aynı ayraçlar
+_PHRASE_SPLIT = re.compile(r'[\,\n;•\-]')
+# "C#", "C++", "Node.js" gibi yazımları korumak için kelime kenarlarından sadece noktalama atılır
+_EDGE_PUNCT = "()[]{}:\"'!?*|"
+
+def _normalize(text: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9]', '', text).lower()
+
+def candidate_phrases(text: str, max_ngram: int = 3, max_phrase_words: int = 6) -> List[str]:
+    """
+    Metni aday ifadelere böler: ayraçlarla ayrılmış kısa parçaların kendisi ve
+    her parçadaki 1..max_ngram kelimelik n-gram'lar. Tekrarlar bir kez döner.
+    """
+    phrases = {}
+    for piece in _PHRASE_SPLIT.split(text):
+        words = [w.strip(_EDGE_PUNCT) for w in piece.split()]
+        words = [w for w in words if w]
+        if not words:
+            continue
+        if len(words) <= max_phrase_words:
+            phrases.setdefault(' '.join(words).lower(), ' '.join(words))
+        for n in range(1, min(max_ngram, len(words)) + 1):
+            for i in range(len(words) - n + 1):
+                phrase = ' '.join(words[i:i + n])
+                phrases.setdefault(phrase.lower(), phrase)
+    return list(phrases.values())
+
+class SkillExtractor:
+    """
+    Anahtar kelimeleri embedding benzerliği ile bulan çıkarıcı.
+    KEYWORDS matrisi bir kez encode edilip .npy olarak saklanır ve sonraki
+    açılışlarda memory-map ile yüklenir. Her doküman için aday ifadeler tek
+    bir batch ile encode edilir ve tek bir matris çarpımıyla eşleştirilir.
+    """
+
+    def __init__(self, keyword_map: Dict[str, str], model_name: Optional[str] = None,
+                 matrix_dir: Optional[str] = None, batch_size: int = 64):
+        self.model_name = model_name
+        self.matrix_dir = matrix_dir
+        self.batch_size = batch_size
+        # normalize -> orijinal; embedding orijinal yazımdan ("React.js") hesaplanır
+        self.norm_keywords = list(keyword_map)
+        self.texts = [keyword_map[kw] for kw in self.norm_keywords]
+        self._exact = {kw: i for i, kw in enumerate(self.norm_keywords)}
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [model_name or config.EMBEDDING_MODEL_NAME, self.texts], ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return get_model(self.model_name)
+
+    @property
+    def matrix_path(self) -> Optional[str]:
+        if not self.matrix_dir:
+            return None
+        return os.path.join(self.matrix_dir, f"skill_embeddings-{self.fingerprint[:16]}.npy")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        with span("model_encode"):
+            return self.model.encode(
+                texts, batch_size=self.batch_size,
+                convert_to_numpy=True, normalize_embeddings=True
+            ).astype(np.float32, copy=False)
+
+    def _load_or_build(self) -> np.ndarray:
+        path = self.matrix_path
+        if path and os.path.exists(path):
+            matrix = np.load(path, mmap_mode='r')
+            if matrix.ndim == 2 and matrix.shape[0] == len(self.texts):
+                return matrix
+        matrix = self._encode(self.texts)
+        if not path:
+            return matrix
+        # Aynı anda çalışan süreçler yarım dosya görmesin diye geçici dosya + rename
+        os.makedirs(self.matrix_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=self.matrix_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, matrix, allow_pickle=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return np.load(path, mmap_mode='r')
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            with self._lock:
+                if self._matrix is None:
+                    self._matrix = self._load_or_build()
+        return self._matrix
+
+    def match_phrases(self, phrases: List[str], threshold: float) -> List[Set[str]]:
+        """
+        Her ifade için eşik değerini aşan normalize anahtar kelimeleri döner.
+        Normalize hali birebir bir anahtar kelime olan ifadeler modele gitmez.
+        """
+        results: List[Set[str]] = [set() for _ in phrases]
+        pending = []
+        for i, phrase in enumerate(phrases):
+            exact = self._exact.get(_normalize(phrase))
+            if exact is not None:
+                results[i].add(self.norm_keywords[exact])
+            else:
+                pending.append(i)
+        if pending:
+            scores = self._encode([phrases[i] for i in pending]) @ self.matrix().T
+            rows, cols = np.nonzero(scores >= threshold)
+            for row, col in zip(rows, cols):
+                results[pending[int(row)]].add(self.norm_keywords[int(col)])
+        return results
+
+    def extract(self, texts: Iterable[str], threshold: Optional[float] = None) -> Set[str]:
+        threshold = config.SKILL_SIMILARITY_THRESHOLD if threshold is None else threshold
+        phrases = []
+        for text in texts:
+            phrases.extend(candidate_phrases(text))
+        keywords = set()
+        for matched in self.match_phrases(list(dict.fromkeys(phrases)), threshold):
+            keywords |= matched
+        return keywords
+
+    def extract_sections(self, sections: Dict[str, str], threshold: Optional[float] = None) -> Dict[str, Set[str]]:
+        """
+        Tüm bölümlerin ifadelerini tek batch'te eşleştirip bölüm -> anahtar kelimeler döner.
+        """
+        threshold = config.SKILL_SIMILARITY_THRESHOLD if threshold is None else threshold
+        per_section = {section: candidate_phrases(text) for section, text in sections.items()}
+        unique = list(dict.fromkeys(p for phrases in per_section.values() for p in phrases))
+        matched = dict(zip(unique, self.match_phrases(unique, threshold)))
+        result = {}
+        for section, phrases in per_section.items():
+            keywords = set()
+            for phrase in phrases:
+                keywords |= matched[phrase]
+            result[section] = keywords
+        return result
+
+def get_skill_extractor() -> SkillExtractor:
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                from cv_job_matcher.matching.matcher import KEYWORD_MAP
+                _extractor = SkillExtractor(KEYWORD_MAP, matrix_dir=config.SKILL_MATRIX_DIR or None)
+    return _extractor
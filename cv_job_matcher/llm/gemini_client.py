@@ -1,9 +1,131 @@
-import requests
+import asyncio
+import random
+import threading
+from typing import Optional
+import httpx
+from cv_job_matcher import config
+from cv_job_matcher.utils.metrics import LLM_REQUESTS, LLM_TOKENS, enabled as metrics_enabled, span
 
-def call_gemini_flash_api(payload):
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
+GENERATION_CONFIG = {"temperature": 0.15}
+# Bu durum kodlarında istek yeniden denenir
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def gemini_url(base_url: Optional[str] = None, model: Optional[str] = None) -> str:
+    base_url = (base_url or config.GEMINI_BASE_URL).rstrip('/')
+    return f"{base_url}/v1beta/models/{model or config.GEMINI_MODEL}:generateContent"
+
+def build_request_body(payload):
     payload = dict(payload)
-    payload["generationConfig"] = {"temperature": 0.15}
-    response = requests.post(url, json=payload)
+    payload["generationConfig"] = dict(GENERATION_CONFIG)
+    return payload
+
+def call_gemini_flash_api(payload):
+    # Senkron istemci sadece script'lerde kullanılır; sunucu açılışında import edilmez
+    import requests
+    response = requests.post(
+        gemini_url(), params={"key": config.GEMINI_API_KEY}, json=build_request_body(payload),
+        timeout=(config.GEMINI_CONNECT_TIMEOUT, config.GEMINI_READ_TIMEOUT)
+    )
     response.raise_for_status()
     return response.json()
+
+def _count_attempt(outcome: str, result: Optional[dict] = None) -> None:
+    if not metrics_enabled():
+        return
+    LLM_REQUESTS.inc(outcome)
+    usage = (result or {}).get("usageMetadata") or {}
+    for field, kind in (("promptTokenCount", "prompt"), ("candidatesTokenCount", "completion")):
+        if usage.get(field):
+            LLM_TOKENS.inc(kind, amount=usage[field])
+
+class GeminiClient:
+    """
+    Kalıcı bağlantı havuzu kullanan asenkron Gemini istemcisi.
+    Aynı anda giden istek sayısı semafor ile sınırlanır; 429/5xx yanıtlarında ve
+    bağlantı hatalarında jitter'lı üstel bekleme ile sınırlı sayıda yeniden dener.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None, model: Optional[str] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 max_connections: Optional[int] = None, backoff_base: Optional[float] = None,
+                 backoff_max: Optional[float] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = gemini_url(base_url, model)
+        self.api_key = config.GEMINI_API_KEY if api_key is None else api_key
+        connect_timeout = config.GEMINI_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
+        read_timeout = config.GEMINI_READ_TIMEOUT if read_timeout is None else read_timeout
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = config.GEMINI_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = config.GEMINI_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = config.GEMINI_BACKOFF_MAX if backoff_max is None else backoff_max
+        max_connections = config.GEMINI_MAX_CONNECTIONS if max_connections is None else max_connections
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.semaphore = asyncio.Semaphore(config.GEMINI_MAX_CONCURRENCY if max_concurrency is None else max_concurrency)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self.transport)
+        return self._client
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        # Sunucu Retry-After gönderdiyse ona uy, yoksa "full jitter" bekleme
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def generate(self, payload) -> dict:
+        # Süreye semafor beklemesi ve yeniden denemeler dahildir
+        with span("llm_request"):
+            return await self._generate(build_request_body(payload))
+
+    async def _generate(self, body) -> dict:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                async with self.semaphore:
+                    response = await self.client.post(self.url, params={"key": self.api_key}, json=body)
+            except (httpx.TimeoutException, httpx.TransportError):
+                if last_attempt:
+                    _count_attempt("error")
+                    raise
+                _count_attempt("retry")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                _count_attempt("retry")
+                await asyncio.sleep(self._backoff(attempt, response))
+                continue
+            if response.is_error:
+                _count_attempt("error")
+            response.raise_for_status()
+            result = response.json()
+            _count_attempt("ok", result)
+            return result
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+_client: Optional[GeminiClient] = None
+_client_lock = threading.Lock()
+
+def get_gemini_client() -> GeminiClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient()
+    return _client
+
+async def call_gemini_flash_api_async(payload):
+    return await get_gemini_client().generate(payload)
+
+async def close_gemini_client() -> None:
+    if _client is not None:
+        await _client.aclose()
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from cv_job_matcher import config
+from cv_job_matcher.llm.gemini_client import build_request_body, call_gemini_flash_api_async
+
+HIT = "HIT"
+MISS = "MISS"
+COALESCED = "COALESCED"
+
+def payload_key(payload, model: Optional[str] = None) -> str:
+    # generationConfig dahil, anahtar sırasından bağımsız kanonik JSON
+    body = build_request_body(payload)
+    canonical = json.dumps([model or config.GEMINI_MODEL, body], sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class LLMResponseCache:
+    """
+    Gemini yanıtları için TTL ve boyut sınırlı önbellek.
+    İsteğe bağlı olarak SQLite'a da yazar. Aynı anda gelen birebir aynı istekler
+    birleştirilir (coalescing): upstream'e tek istek gider, bekleyen herkes aynı
+    sonucu alır.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400, db_path: Optional[str] = None,
+                 max_db_entries: int = 100000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_db_entries = max_db_entries
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._puts = 0
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, value) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._memory.move_to_end(key)
+                return entry[1]
+            del self._memory[key]
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                self._remember(key, row[1], value)
+                return value
+        return None
+
+    def put(self, key: str, value) -> None:
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(key, expires_at, value)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                # Süresi dolanları ve kapasiteyi aşan en eski kayıtları temizle
+                self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_db_entries,)
+                )
+            self._db.commit()
+
+    async def get_or_call(self, payload, call: Callable[[Any], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        Yanıtı ve nereden geldiğini (HIT, MISS, COALESCED) döner.
+        """
+        key = payload_key(payload)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, HIT
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), COALESCED
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await call(payload)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Bekleyen yoksa "exception was never retrieved" uyarısını engelle
+            future.exception()
+            raise
+        else:
+            self.put(key, result)
+            future.set_result(result)
+            return result, MISS
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "memory_entries": len(self._memory),
+            "in_flight": len(self._in_flight),
+        }
+
+_cache: Optional[LLMResponseCache] = None
+
+def get_llm_cache() -> LLMResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache(config.LLM_CACHE_SIZE, config.LLM_CACHE_TTL, config.LLM_CACHE_DB or None)
+    return _cache
+
+async def call_gemini_flash_api_cached(payload) -> Tuple[Any, str]:
+    if not config.LLM_CACHE_ENABLED:
+        return await call_gemini_flash_api_async(payload), MISS
+    return await get_llm_cache().get_or_call(payload, call_gemini_flash_api_async)
@@ -1,41 +1,302 @@
-from fastapi import FastAPI, UploadFile, File, Form
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, Response
 from fastapi.responses import JSONResponse
 import uvicorn
+import httpx
 from pydantic import BaseModel
-from cv_job_matcher.parsers.cv_parser import parse_cv
-from cv_job_matcher.parsers.job_parser import parse_job_posting
-from cv_job_matcher.matching.matcher import match_and_score
-from cv_job_matcher.utils.file_utils import save_upload_file
-from cv_job_matcher.matching.matcher import build_gemini_payload
-from cv_job_matcher.llm.gemini_client import call_gemini_flash_api
+from typing import Dict, List, Literal, Optional
+from starlette.concurrency import run_in_threadpool
+from cv_job_matcher.parsers.cv_parser import (
+    parse_cv, parse_cv_bytes, cv_fingerprint, detect_filetype, load_parser_backends, SECTION_HEADERS
+)
+from cv_job_matcher.parsers.job_parser import parse_job_posting, JOB_SECTION_HEADERS
+from cv_job_matcher.parsers.header_classifier import get_header_classifier
+from cv_job_matcher.matching.matcher import load_skill_extractor, match_and_score
+from cv_job_matcher.utils.file_utils import UploadLimitMiddleware, hash_upload_file
+from cv_job_matcher.matching.matcher import estimate_payload_tokens
+from cv_job_matcher.matching.cascade import build_match_payload, cascade_match, cascade_rank
+from cv_job_matcher.matching.ranker import get_cv_corpus, rank_candidates
+from cv_job_matcher.matching.vector_index import embed_job, embed_sections, get_cv_vector_index
+from cv_job_matcher.llm.gemini_client import close_gemini_client
+from cv_job_matcher.llm.response_cache import call_gemini_flash_api_cached, get_llm_cache
+from cv_job_matcher.utils.metrics import CallbackMetric, MetricsMiddleware, record_stage, render as render_metrics
+from cv_job_matcher.utils.model_registry import preload_models, warmup_model
+from cv_job_matcher.utils.parse_cache import get_parse_cache
+from cv_job_matcher.utils.worker_pool import PoolSaturated, get_parse_pool, shutdown_parse_pool
+from cv_job_matcher.llm import response_cache
+from cv_job_matcher.matching import vector_index
+from cv_job_matcher.utils import parse_cache, worker_pool
+from cv_job_matcher import config
 
-app = FastAPI()
+logger = logging.getLogger("cv_job_matcher")
+
+# /ready, warmup bitene kadar 503 döner
+_warmup_state = {"ready": False, "error": None, "seconds": None}
+
+def warmup():
+    # Model her istekte değil, süreç başına bir kez yüklenir ve bir kez çalıştırılır
+    preload_models()
+    warmup_model()
+    # Başlık embedding matrisleri de bir kez hesaplanır
+    get_header_classifier('cv', SECTION_HEADERS).header_embeddings()
+    get_header_classifier('job', JOB_SECTION_HEADERS).header_embeddings()
+    if config.SKILL_ENGINE == "embedding":
+        # KEYWORDS matrisi diskte yoksa burada bir kez encode edilir, varsa memory-map edilir
+        load_skill_extractor().matrix()
+    load_parser_backends()
+
+def _run_warmup():
+    started = time.perf_counter()
+    try:
+        warmup()
+    except Exception as e:
+        logger.exception("Warmup failed")
+        _warmup_state["error"] = str(e)
+        return
+    _warmup_state["seconds"] = round(time.perf_counter() - started, 3)
+    _warmup_state["ready"] = True
+    record_stage("warmup", _warmup_state["seconds"])
+    logger.info("Warmup finished in %.1fs", _warmup_state["seconds"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.PRELOAD_MODELS:
+        # Sunucu warmup sırasında da /ready'ye cevap verebilsin diye thread'de çalışır
+        app.state.warmup = asyncio.get_running_loop().run_in_executor(None, _run_warmup)
+    else:
+        # Modeller ilk istekte yüklenir
+        _warmup_state["ready"] = True
+    yield
+    await close_gemini_client()
+    shutdown_parse_pool()
+
+app = FastAPI(lifespan=lifespan)
+# Büyük yüklemeler form parse edilmeden reddedilir (metrik middleware'inin içinde kalır)
+app.add_middleware(UploadLimitMiddleware, paths=("/upload_cv",))
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+def _existing_stats(module, name: str) -> Dict:
+    # /metrics okunurken havuz, indeks veya önbellek oluşturulmaz; henüz kullanılmadıysa boş döner
+    instance = getattr(module, name)
+    return instance.stats() if instance is not None else {}
+
+# Önbellek ve havuz sayaçları /metrics okunurken mevcut stats() çıktılarından alınır
+CallbackMetric("cvm_parse_cache_lookups_total", "Parse cache lookups by result.", "counter",
+               lambda: {(key,): value for key, value in _existing_stats(parse_cache, "_cache").items()
+                        if key in ("memory_hits", "disk_hits", "misses")}, ("result",))
+CallbackMetric("cvm_llm_cache_lookups_total", "LLM response cache lookups by result.", "counter",
+               lambda: {(key,): value for key, value in _existing_stats(response_cache, "_cache").items()
+                        if key in ("hits", "misses", "coalesced")}, ("result",))
+CallbackMetric("cvm_parse_pool_tasks", "Parse pool tasks currently running or queued.", "gauge",
+               lambda: {(key,): _existing_stats(worker_pool, "_pool").get(key, 0) for key in ("running", "queue_depth")},
+               ("state",))
+CallbackMetric("cvm_parse_pool_utilization", "Fraction of parse workers busy.", "gauge",
+               lambda: {(): _existing_stats(worker_pool, "_pool").get("utilization", 0)})
+CallbackMetric("cvm_parse_pool_tasks_total", "Finished parse pool tasks by outcome.", "counter",
+               lambda: {(key,): _existing_stats(worker_pool, "_pool").get(key, 0)
+                        for key in ("completed", "failed", "rejected")}, ("outcome",))
+CallbackMetric("cvm_vector_index_rows", "Vectors stored per index field.", "gauge",
+               lambda: {(field,): entry["rows"] for field, entry in _existing_stats(vector_index, "_index").items()},
+               ("field",))
+
+async def _add_to_corpus(cvs: Dict[str, dict]) -> None:
+    corpus = get_cv_corpus()
+    cvs = {cv_id: sections for cv_id, sections in cvs.items() if cv_id not in corpus}
+    if not cvs:
+        return
+    if corpus.engine == "embedding":
+        # Embedding motorunda ekleme model çağırır; event loop'u bloklamaması için thread'de yapılır
+        await run_in_threadpool(_add_all, corpus, cvs)
+    else:
+        _add_all(corpus, cvs)
+
+def _add_all(corpus, cvs: Dict[str, dict]) -> None:
+    for cv_id, sections in cvs.items():
+        corpus.add(cv_id, sections)
+
+def _saturated(e):
+    return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "1"})
 
 class MatchRequest(BaseModel):
     job_sections: dict
     cv_sections: dict
+    # "cascade": önce yerel puan, eşiği geçerse Gemini. Verilmezse config.MATCH_MODE
+    mode: Optional[Literal["llm", "cascade"]] = None
+    min_local_score: Optional[float] = None
+
+class RankRequest(BaseModel):
+    job_sections: dict
+    # {cv_id: cv_sections}; verilmezse yüklenmiş CV havuzu kullanılır
+    cvs: Optional[Dict[str, dict]] = None
+    # Sadece havuzdaki bu CV'ler sıralanır
+    cv_ids: Optional[List[str]] = None
+    top_k: int = 10
+    # Eşiği geçen en iyi llm_top aday ayrıca Gemini ile değerlendirilir (0 = sadece yerel sıralama)
+    llm_top: int = 0
+    min_local_score: Optional[float] = None
+
+class SearchRequest(BaseModel):
+    job_sections: dict
+    top_k: int = 10
+    # "document" (tüm CV) veya bir bölüm adı ("skills", "work_and_employment", ...)
+    field: str = "document"
+    # "exact": tüm CV'ler taranır, "ivf": kümeli arama, "auto": indeks eğitildiyse ivf
+    mode: Literal["auto", "exact", "ivf"] = "auto"
+    nprobe: Optional[int] = None
 
 @app.post("/upload_cv")
 async def upload_cv(file: UploadFile = File(...)):
-    file_path = await save_upload_file(file)
-    result = parse_cv(file_path)
+    try:
+        detect_filetype(file.filename or "")
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    # Dosya Starlette'in tuttuğu yerde parça parça hash'lenir, ayrıca kopyalanmaz
+    upload, content_hash = await hash_upload_file(file)
+    pool = get_parse_pool()
+    try:
+        # Parse işlemi event loop'u bloklamaması için sınırlı worker havuzunda çalışır
+        if pool.kind == "process":
+            # Dosya nesnesi başka process'e taşınamaz; içerik (en fazla UPLOAD_MAX_BYTES)
+            # bir kez belleğe okunup worker'a gönderilir
+            job = pool.submit(parse_cv_bytes, upload.read(), file.filename, content_hash)
+        else:
+            job = pool.submit(parse_cv, upload, content_hash, filename=file.filename)
+    except PoolSaturated as e:
+        return _saturated(e)
+    try:
+        result = await asyncio.wrap_future(job)
+    except asyncio.CancelledError:
+        # Dosyayı Starlette istek bitince kapatır; iptal edilen istekte worker hâlâ
+        # okuyor olabileceğinden iş bitene kadar beklenir
+        await asyncio.wait([asyncio.wrap_future(job)])
+        raise
+    # Toplu sıralama için CV havuzuna ekle
+    await _add_to_corpus({result['cv_id']: result['sections']})
+    if config.VECTOR_INDEX_ENABLED:
+        await _index_cv(result['cv_id'], result['sections'])
     return result
 
+async def _index_cv(cv_id: str, sections: Dict[str, str]) -> None:
+    # İndeksleme best-effort'tur: CV parse edilip kaydedildiği için indeks hatası yüklemeyi başarısız saymaz
+    try:
+        # İndeks dosyaları event loop dışında açılır; embedding'ler havuzda hesaplanır
+        index = await run_in_threadpool(get_cv_vector_index)
+        if await run_in_threadpool(index.__contains__, cv_id):
+            return
+        document, vectors = await get_parse_pool().run(embed_sections, sections)
+        await run_in_threadpool(index.add, cv_id, document, vectors)
+    except PoolSaturated:
+        logger.warning("Parse pool is full, CV %s was not added to the vector index", cv_id)
+    except Exception:
+        logger.exception("Failed to add CV %s to the vector index", cv_id)
+
 @app.post("/upload_job")
 async def upload_job(text: str = Form(...)):
     try:
-        result = parse_job_posting(text)
+        result = await get_parse_pool().run(parse_job_posting, text)
+    except PoolSaturated as e:
+        return _saturated(e)
     except Exception as e:
         return JSONResponse(status_code=400, content={"error": str(e)})
     return result
 
 @app.post("/match")
-def match(request: MatchRequest):
+async def match(request: MatchRequest, response: Response):
     cv_sections = request.cv_sections.get("sections", request.cv_sections)
     job_sections = request.job_sections.get("sections", request.job_sections)
-    payload = build_gemini_payload(job_sections, cv_sections)
-    llm_response = call_gemini_flash_api(payload)
+    if (request.mode or config.MATCH_MODE) == "cascade":
+        try:
+            result = await cascade_match(job_sections, cv_sections, request.min_local_score)
+        except httpx.HTTPError as e:
+            return JSONResponse(status_code=502, content={"error": f"Gemini request failed: {e}"})
+        response.headers["X-Match-Tier"] = result["tier"]
+        return result
+    if config.PROMPT_COMPACT:
+        # Kompakt prompt ilanın anahtar kelimelerini çıkarır (embedding motorunda model çağrısı)
+        payload = await run_in_threadpool(build_match_payload, job_sections, cv_sections)
+    else:
+        payload = build_match_payload(job_sections, cv_sections)
+    response.headers["X-Prompt-Tokens"] = str(estimate_payload_tokens(payload))
+    try:
+        llm_response, cache_status = await call_gemini_flash_api_cached(payload)
+    except httpx.HTTPError as e:
+        return JSONResponse(status_code=502, content={"error": f"Gemini request failed: {e}"})
+    # HIT: önbellekten, COALESCED: aynı anda gelen eş bir isteğin sonucundan, MISS: Gemini'den
+    response.headers["X-Cache"] = cache_status
     return llm_response
 
+def _cached_cv_sections(cv_ids):
+    fingerprint = cv_fingerprint()
+    sections = {}
+    for cv_id in cv_ids:
+        cached = get_parse_cache().get('cv', cv_id, fingerprint)
+        if cached is not None:
+            sections[cv_id] = cached['sections']
+    return sections
+
+@app.post("/rank")
+async def rank(request: RankRequest):
+    job_sections = request.job_sections.get("sections", request.job_sections)
+    if request.cvs is not None:
+        # İstekle gelen CV'ler havuzu kirletmemesi için geçici bir corpus'ta sıralanır
+        cvs = {cv_id: sections.get("sections", sections) for cv_id, sections in request.cvs.items()}
+        ranking = await run_in_threadpool(rank_candidates, job_sections, cvs, request.top_k)
+    else:
+        cvs = None
+        corpus = get_cv_corpus()
+        if request.cv_ids is not None:
+            unknown = [cv_id for cv_id in request.cv_ids if cv_id not in corpus]
+            # Süreç yeniden başladıysa CV'ler parse önbelleğinden geri yüklenir
+            restored = _cached_cv_sections(unknown)
+            await _add_to_corpus(restored)
+            missing = [cv_id for cv_id in unknown if cv_id not in restored]
+            if missing:
+                return JSONResponse(status_code=404, content={"error": "Unknown cv_ids", "cv_ids": missing})
+        ranking = await run_in_threadpool(
+            rank_candidates, job_sections, top_k=request.top_k, corpus=corpus, cv_ids=request.cv_ids
+        )
+    if request.llm_top > 0:
+        # Cascade: sadece kısa listeye kalan en iyi adaylar Gemini'ye gider
+        if cvs is None:
+            # Sıralama puana göre azalan olduğundan kısa liste her zaman baştaki adaylardır
+            cvs = _cached_cv_sections(c["cv_id"] for c in ranking["candidates"][:request.llm_top])
+        ranking = await cascade_rank(job_sections, ranking, cvs, request.min_local_score, request.llm_top)
+    return ranking
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    if not config.VECTOR_INDEX_ENABLED:
+        return JSONResponse(status_code=404, content={"error": "Vector index is disabled"})
+    job_sections = request.job_sections.get("sections", request.job_sections)
+    try:
+        query = await get_parse_pool().run(embed_job, job_sections)
+    except PoolSaturated as e:
+        return _saturated(e)
+    return await run_in_threadpool(
+        get_cv_vector_index().search, query, request.top_k, request.field, request.mode, request.nprobe
+    )
+
+@app.get("/stats")
+def stats():
+    result = {"parse_cache": get_parse_cache().stats(), "llm_cache": get_llm_cache().stats(),
+              "parse_pool": get_parse_pool().stats()}
+    if config.VECTOR_INDEX_ENABLED:
+        result["vector_index"] = get_cv_vector_index().stats()
+    return result
+
+@app.get("/ready")
+def ready():
+    if not _warmup_state["ready"]:
+        return JSONResponse(status_code=503, content={"ready": False, "error": _warmup_state["error"]})
+    return {"ready": True, "warmup_seconds": _warmup_state["seconds"]}
+
+@app.get("/metrics")
+def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     uvicorn.run("cv_job_matcher.main:app", host="0.0.0.0", port=8152, reload=True)
@@ -0,0 +1,96 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from cv_job_matcher import config
+from cv_job_matcher.llm.response_cache import call_gemini_flash_api_cached
+from cv_job_matcher.matching.matcher import (
+    build_gemini_payload, compact_prompt_keywords, estimate_payload_tokens, match_and_score
+)
+
+LOCAL_TIER = "local"
+LLM_TIER = "llm"
+# Bir anahtar kelimeden alınabilecek en yüksek progressive puan
+MAX_KEYWORD_SCORE = 5
+
+def build_match_payload(job_sections, cv_sections, keywords=None):
+    return build_gemini_payload(
+        job_sections, cv_sections, keywords,
+        compact=config.PROMPT_COMPACT, token_budget=config.PROMPT_TOKEN_BUDGET or None
+    )
+
+def build_match_payloads(job_sections, cv_sections_list: List[dict]) -> List[dict]:
+    # Aynı ilan için anahtar kelimeler bir kez çıkarılır, her CV'nin prompt'unda kullanılır
+    keywords = compact_prompt_keywords(job_sections) if config.PROMPT_COMPACT and cv_sections_list else None
+    return [build_match_payload(job_sections, cv_sections, keywords) for cv_sections in cv_sections_list]
+
+def local_score_ratio(total_score, keyword_count):
+    # İlanda tanınan anahtar kelime yoksa yerel puan karar veremez
+    if keyword_count == 0:
+        return None
+    return total_score / (MAX_KEYWORD_SCORE * keyword_count)
+
+def local_screen(job_sections, cv_sections, min_score: Optional[float] = None) -> Dict:
+    """
+    Yerel anahtar kelime puanıyla ön eleme yapar. Puan oranı min_score'un altındaysa
+    aday LLM'e gönderilmeden elenir.
+    """
+    if min_score is None:
+        min_score = config.CASCADE_MIN_SCORE
+    total_score, keyword_scores = match_and_score(job_sections, cv_sections)
+    ratio = local_score_ratio(total_score, len(keyword_scores))
+    return {
+        "local_score": total_score,
+        "local_score_ratio": ratio,
+        "keyword_scores": keyword_scores,
+        "shortlisted": ratio is None or ratio >= min_score,
+    }
+
+async def cascade_match(job_sections, cv_sections, min_score: Optional[float] = None,
+                        llm_call: Callable = call_gemini_flash_api_cached) -> Dict:
+    """
+    Önce yerel puanlama; sadece kısa listeye kalan aday için Gemini çağrılır.
+    Dönen sonuçtaki "tier" alanı kararı hangi katmanın verdiğini gösterir.
+    """
+    # Yerel puanlama ve prompt üretimi CPU (embedding motorunda model) işidir, thread'de çalışır
+    result = await run_in_threadpool(local_screen, job_sections, cv_sections, min_score)
+    if not result["shortlisted"]:
+        result["tier"] = LOCAL_TIER
+        return result
+    payload = await run_in_threadpool(build_match_payload, job_sections, cv_sections)
+    llm_response, cache_status = await llm_call(payload)
+    result.update({
+        "tier": LLM_TIER,
+        "llm": llm_response,
+        "cache": cache_status,
+        "prompt_tokens": estimate_payload_tokens(payload),
+    })
+    return result
+
+async def cascade_rank(job_sections, ranking: Dict, sections_by_id: Dict[str, dict], min_score: Optional[float] = None,
+                       llm_top: int = 10, llm_call: Callable = call_gemini_flash_api_cached) -> Dict:
+    """
+    rank_candidates sonucunu katmanlı değerlendirir: eşik altındaki adaylar yerelde
+    elenir, eşiği geçenlerden en iyi llm_top tanesi eşzamanlı olarak Gemini'ye gider.
+    """
+    if min_score is None:
+        min_score = config.CASCADE_MIN_SCORE
+    keyword_count = len(ranking["keywords"])
+    selected = []
+    for candidate in ranking["candidates"]:
+        ratio = local_score_ratio(candidate["total_score"], keyword_count)
+        candidate["local_score_ratio"] = ratio
+        candidate["shortlisted"] = ratio is None or ratio >= min_score
+        candidate["tier"] = LOCAL_TIER
+        if candidate["shortlisted"] and len(selected) < llm_top and candidate["cv_id"] in sections_by_id:
+            selected.append(candidate)
+    payloads = await run_in_threadpool(
+        build_match_payloads, job_sections, [sections_by_id[c["cv_id"]] for c in selected]
+    )
+    responses = await asyncio.gather(*[llm_call(p) for p in payloads], return_exceptions=True)
+    for candidate, response in zip(selected, responses):
+        if isinstance(response, BaseException):
+            candidate["llm_error"] = str(response)
+            continue
+        candidate["tier"] = LLM_TIER
+        candidate["llm"], candidate["cache"] = response
+    return ranking
@@ -0,0 +1,94 @@
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+def _ratio_bound(matches: int, total: int) -> float:
+    # difflib ile aynı formül: 2 * M / T
+    if total:
+        return 2.0 * matches / total
+    return 1.0
+
+class KeywordIndex:
+    """
+    Normalize edilmiş anahtar kelimeler üzerinde bulanık (fuzzy) arama indeksi.
+    find_best_keyword_match ile aynı sonucu verir, fakat her kelimeyi tüm listeyle
+    SequenceMatcher ile karşılaştırmak yerine:
+    - birebir eşleşmeleri hash tablosundan döner,
+    - uzunluk ve karakter sayısı üst sınırlarıyla eşiği geçemeyecek adayları eler,
+    - sadece kalan adaylar için SequenceMatcher oranını hesaplar.
+    """
+
+    def __init__(self, normalized_keywords: Iterable[str], cache_size: int = 4096):
+        self.keywords: List[str] = []
+        self._exact = set()
+        self._by_length = defaultdict(list)
+        for kw in normalized_keywords:
+            # Aynı kelimenin tekrarı sonucu değiştirmez (eşitlikte ilk kelime kazanır)
+            if kw in self._exact:
+                continue
+            self._exact.add(kw)
+            order = len(self.keywords)
+            self.keywords.append(kw)
+            self._by_length[len(kw)].append((order, kw, Counter(kw)))
+        self._lengths = sorted(self._by_length)
+        self.best_match = lru_cache(maxsize=cache_size)(self._best_match)
+
+    def _candidates(self, word: str, threshold: float):
+        la = len(word)
+        counts = Counter(word)
+        candidates = []
+        for lb in self._lengths:
+            # real_quick_ratio üst sınırı
+            if _ratio_bound(min(la, lb), la + lb) < threshold:
+                continue
+            for order, kw, kw_counts in self._by_length[lb]:
+                # quick_ratio üst sınırı: ortak karakterlerin çoklu küme kesişimi
+                common = 0
+                for ch, n in counts.items():
+                    m = kw_counts.get(ch)
+                    if m:
+                        common += n if n < m else m
+                if _ratio_bound(common, la + lb) >= threshold:
+                    candidates.append((order, kw))
+        candidates.sort()
+        return candidates
+
+    def _best_match(self, word: str, threshold: float = 0.8) -> Optional[str]:
+        if word in self._exact and threshold <= 1:
+            return word
+        if threshold > 0:
+            candidates = self._candidates(word, threshold)
+        else:
+            # Eleme sınırları pozitif eşik varsayar, bu durumda tüm liste taranır
+            candidates = enumerate(self.keywords)
+        best_match = None
+        best_score = 0
+        for _, kw in candidates:
+            score = SequenceMatcher(None, word, kw).ratio()
+            if score > best_score:
+                best_score = score
+                best_match = kw
+        if best_score >= threshold:
+            return best_match
+        return None
+
+    def all_matches(self, word: str, threshold: float = 0.8, reverse: bool = False) -> List[str]:
+        """
+        Oranı eşik değerini geçen tüm kelimeleri döner.
+        reverse=True ise oran SequenceMatcher(None, kelime, word) ile hesaplanır;
+        yani indeksteki kelime sorgulanan taraf olarak kabul edilir.
+        """
+        if threshold > 0:
+            candidates = self._candidates(word, threshold)
+        else:
+            candidates = enumerate(self.keywords)
+        matches = []
+        for _, kw in candidates:
+            if reverse:
+                score = SequenceMatcher(None, kw, word).ratio()
+            else:
+                score = SequenceMatcher(None, word, kw).ratio()
+            if score > 0 and score >= threshold:
+                matches.append(kw)
+        return matches
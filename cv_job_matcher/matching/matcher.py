@@ -1,6 +1,12 @@
+import logging
 import re
 from difflib import SequenceMatcher
+from cv_job_matcher import config
 from cv_job_matcher.keywords import KEYWORDS
+from cv_job_matcher.matching.keyword_index import KeywordIndex
+from cv_job_matcher.utils.metrics import span
+
+logger = logging.getLogger("cv_job_matcher.matcher")
 
 # Normalizasyon fonksiyonu
 def normalize_keyword(kw):
@@ -9,6 +15,8 @@ def normalize_keyword(kw):
 # KEYWORDS listesini normalize edilmiş set olarak hazırla
 NORMALIZED_KEYWORDS = [normalize_keyword(kw) for kw in KEYWORDS]
 KEYWORD_MAP = {normalize_keyword(kw): kw for kw in KEYWORDS}  # normalize -> orijinal
+# Import sırasında bir kez kurulan bulanık arama indeksi
+KEYWORD_INDEX = KeywordIndex(NORMALIZED_KEYWORDS)
 
 # Benzerlik oranı fonksiyonu
 def similarity(a, b):
@@ -27,136 +35,291 @@ def find_best_keyword_match(word, normalized_keywords, threshold=0.8):
         return best_match
     return None
 
-def extract_keywords_from_job(job_sections, threshold=0.8):
+JOB_KEYWORD_SECTIONS = (
+    'required_skills', 'responsibilities', 'requirements',
+    'preferred_skills', 'soft_skills', 'job_description'
+)
+
+def load_skill_extractor():
+    # Embedding motoru sadece seçildiğinde yüklenir (model ve KEYWORDS matrisi)
+    from cv_job_matcher.extractors.skill_extractor import get_skill_extractor
+    return get_skill_extractor()
+
+def resolve_skill_engine(engine):
+    engine = engine or config.SKILL_ENGINE
+    if engine not in ("lexical", "embedding"):
+        raise ValueError(f"Unsupported skill engine: {engine}")
+    return engine
+
+def extract_keywords_from_job(job_sections, threshold=0.8, engine=None):
     """
     İş tanımındaki önemli anahtar kelimeleri çıkarır.
     Sadece whitelist'te benzerlik oranı eşik değerini aşanları döndürür.
+    engine="embedding" ise eşleşme anlamsal benzerlikle yapılır (eşik: SKILL_SIMILARITY_THRESHOLD).
+    """
+    with span("keyword_extract"):
+        if resolve_skill_engine(engine) == "embedding":
+            texts = [job_sections.get(section, '') for section in JOB_KEYWORD_SECTIONS]
+            return list(load_skill_extractor().extract(texts))
+        keywords = set()
+        for section in JOB_KEYWORD_SECTIONS:
+            text = job_sections.get(section, '')
+            for kw in re.split(r'[\,\n;•\-]', text):
+                norm_kw = normalize_keyword(kw.strip())
+                if norm_kw and len(norm_kw) > 1:
+                    match = KEYWORD_INDEX.best_match(norm_kw, threshold)
+                    if match:
+                        keywords.add(match)
+        return list(keywords)
+
+def tokenize_section(text):
+    return [normalize_keyword(w) for w in re.split(r'[\,\n;•\-]', text)]
+
+class CVIndex:
+    """
+    CV bölümlerini bir kez tokenize edip normalize eder.
+    Her bölüm için ayrı bir KeywordIndex tutulur; böylece her anahtar kelime için
+    CV metni tekrar bölünmez ve normalize edilmez.
+    engine="embedding" ise her bölümdeki anahtar kelimeler tek batch'te anlamsal
+    olarak bulunur ve contains* sorguları bu kümelere bakar.
     """
-    keywords = set()
-    job_keyword_sections = [
-        'required_skills', 'responsibilities', 'requirements',
-        'preferred_skills', 'soft_skills', 'job_description'
-    ]
-    for section in job_keyword_sections:
-        text = job_sections.get(section, '')
-        for kw in re.split(r'[\,\n;•\-]', text):
-            norm_kw = normalize_keyword(kw.strip())
-            if norm_kw and len(norm_kw) > 1:
-                match = find_best_keyword_match(norm_kw, NORMALIZED_KEYWORDS, threshold)
-                if match:
-                    keywords.add(match)
-    return list(keywords)
-
-def score_keyword_in_cv_progressive(keyword, cv_sections, threshold=0.8):
+    TIER_SECTIONS = ('education_and_training', 'misc', 'accomplishments')
+
+    def __init__(self, cv_sections, engine=None):
+        self.engine = resolve_skill_engine(engine)
+        if self.engine == "embedding":
+            self.skills = load_skill_extractor().extract_sections(cv_sections)
+            self._all_skills = set().union(*self.skills.values())
+            return
+        self.sections = {sec: KeywordIndex(tokenize_section(text)) for sec, text in cv_sections.items()}
+        # Bölümü olmayan CV'de de aynı davranış: boş metin tek bir boş token üretir
+        self._empty = KeywordIndex([''])
+        all_tokens = []
+        for index in self.sections.values():
+            all_tokens.extend(index.keywords)
+        self._anywhere = KeywordIndex(all_tokens) if self.sections else None
+
+    def contains(self, section, norm_keyword, threshold=0.8):
+        if self.engine == "embedding":
+            return norm_keyword in self.skills.get(section, ())
+        index = self.sections.get(section, self._empty)
+        return index.best_match(norm_keyword, threshold) is not None
+
+    def contains_anywhere(self, norm_keyword, threshold=0.8):
+        if self.engine == "embedding":
+            return norm_keyword in self._all_skills
+        if self._anywhere is None:
+            return False
+        return self._anywhere.best_match(norm_keyword, threshold) is not None
+
+    def score(self, keyword, threshold=0.8):
+        norm_keyword = normalize_keyword(keyword)
+        score = 0
+        # 3: skills kısmında geçiyorsa
+        if self.contains('skills', norm_keyword, threshold):
+            score = max(score, 3)
+        # 5: work_and_employment kısmında detaylı geçiyorsa, daha önce 3 aldıysa +2 ekle
+        if self.contains('work_and_employment', norm_keyword, threshold):
+            if score == 3:
+                score += 2  # +2 ekle
+            else:
+                score = max(score, 5)
+        # 2: education_and_training, misc, accomplishments bölümlerinde geçiyorsa
+        for sec in self.TIER_SECTIONS:
+            if self.contains(sec, norm_keyword, threshold):
+                score = max(score, 2)
+        # 1: herhangi bir yerde geçiyorsa, daha önce puan almadıysa
+        if score == 0 and self.contains_anywhere(norm_keyword, threshold):
+            score = 1
+        return score
+
+def score_keyword_in_cv_progressive(keyword, cv_sections, threshold=0.8, cv_index=None):
     """
     Anahtar kelimeyi CV'de arar ve progressive puanlama uygular.
     Benzerlik oranı eşik değerini aşan kelimeler için çalışır.
     """
-    norm_keyword = normalize_keyword(keyword)
-    score = 0
-    # 3: skills kısmında geçiyorsa
-    if find_best_keyword_match(norm_keyword, [normalize_keyword(w) for w in re.split(r'[\,\n;•\-]', cv_sections.get('skills', ''))], threshold) is not None:
-        score = max(score, 3)
-    # 5: work_and_employment kısmında detaylı geçiyorsa, daha önce 3 aldıysa +2 ekle
-    if find_best_keyword_match(norm_keyword, [normalize_keyword(w) for w in re.split(r'[\,\n;•\-]', cv_sections.get('work_and_employment', ''))], threshold) is not None:
-        if score == 3:
-            score += 2  # +2 ekle
-        else:
-            score = max(score, 5)
-    # 2: education_and_training, misc, accomplishments bölümlerinde geçiyorsa
-    for sec in ['education_and_training', 'misc', 'accomplishments']:
-        if find_best_keyword_match(norm_keyword, [normalize_keyword(w) for w in re.split(r'[\,\n;•\-]', cv_sections.get(sec, ''))], threshold) is not None:
-            score = max(score, 2)
-    # 1: herhangi bir yerde geçiyorsa, daha önce puan almadıysa
-    if score == 0:
-        for sec in cv_sections:
-            if find_best_keyword_match(norm_keyword, [normalize_keyword(w) for w in re.split(r'[\,\n;•\-]', cv_sections.get(sec, ''))], threshold) is not None:
-                score = 1
-                break
-    return score
-
-def match_and_score(job_sections, cv_sections, threshold=0.8):
-  
-    keywords = extract_keywords_from_job(job_sections, threshold)
-    total_score = 0
-    keyword_scores = {}
-    for kw in keywords:
-        score = score_keyword_in_cv_progressive(kw, cv_sections, threshold)
-        keyword_scores[KEYWORD_MAP[kw]] = score
-        total_score += score
+    if cv_index is None:
+        cv_index = CVIndex(cv_sections)
+    return cv_index.score(keyword, threshold)
+
+def match_and_score(job_sections, cv_sections, threshold=0.8, engine=None):
+    # CV bir kez indekslenir, tüm anahtar kelimeler aynı indeks üzerinden puanlanır
+    keywords = extract_keywords_from_job(job_sections, threshold, engine)
+    with span("keyword_scoring"):
+        cv_index = CVIndex(cv_sections, engine)
+        total_score = 0
+        keyword_scores = {}
+        for kw in keywords:
+            score = cv_index.score(kw, threshold)
+            keyword_scores[KEYWORD_MAP[kw]] = score
+            total_score += score
     return total_score, keyword_scores
 
-def build_gemini_prompt(job_sections, cv_sections, keywords=None):
+PROMPT_INSTRUCTIONS = (
+    "Below are the sections of a job posting and a CV, a list of keywords, and scoring rules.\n"
+    "For each keyword:\n"
+    "- Assign a score (0, 1, 3, 5).\n"
+    "- Indicate the source: 'work experience', 'skills', 'other' (e.g., if found in work experience section, use 'work experience'; if in skills, use 'skills'; if only in CV but not in those sections, use 'other'; if not found, use 'none').\n"
+    "Additionally, evaluate education:\n"
+    "- If the department(s) required by the job match the candidate's degree, add a department score.\n"
+    "- Score the university based on the following tier list:\n"
+    "  * Tier 1 (top universities): 10 points\n"
+    "  * Tier 2: 8 points\n"
+    "  * Tier 3: 5 points\n"
+    "  * Tier 4: 3 points\n"
+    "  * Tier 5: 2 points\n"
+    "- Indicate the university's tier and whether the department matches.\n"
+    "Also, evaluate work experience years:\n"
+    "- Only consider full-time, professional work experience (do NOT include internships, education, part-time, or freelance jobs).\n"
+    "- For each job in the CV's work experience section, extract the start and end dates (month and year).\n"
+    "- For each job, calculate the duration in months by subtracting the start date from the end date. If the end date is 'Present' or 'Current', use the current date.\n"
+    "- Sum up all durations to get the total professional work experience in years (round to the nearest half year).\n"
+    "- If dates are missing or unclear, ignore that job.\n"
+    "- Do NOT guess or assume experience if dates are not explicit.\n"
+    "- Report the total professional work experience in years.\n"
+    "- If the job posting specifies required years of experience, compare it to the candidate's total years of professional work experience.\n"
+    "- Scoring for experience years:\n"
+    "  * Exact match (e.g., 5 years required, 5 years in CV): 30 points\n"
+    "  * Close match (e.g., 5 years required, 4 or 6 years in CV): 20 points\n"
+    "  * Distant match (e.g., 5 years required, 2-3 or 7-8 years in CV): 5 points\n"
+    "  * Very distant or missing (1 year or none): 0 points\n"
+    "- Indicate both the required and found years, and the match type.\n"
+    "Return a very short and clear JSON. Example format:\n"
+    "{\n"
+    "  \"keywords\": {\n"
+    "    \"React\": {\"score\": 5, \"source\": \"work experience\"},\n"
+    "    ...\n"
+    "  },\n"
+    "  \"education\": {\n"
+    "    \"university\": \"Bogazici University\",\n"
+    "    \"tier\": 1,\n"
+    "    \"score\": 10,\n"
+    "    \"department_match\": true,\n"
+    "    \"department_score\": 5\n"
+    "  },\n"
+    "  \"experience_years\": {\n"
+    "    \"required\": 5,\n"
+    "    \"found\": 5,\n"
+    "    \"match_type\": \"exact\",\n"
+    "    \"score\": 30\n"
+    "  },\n"
+    "  \"total_score\": 65,\n"
+    "  \"summary\": \"The candidate scored 65 points. The university and department are a great fit. Experience matches exactly. Technically strong, should be invited for an interview.\"\n"
+    "}\n"
+    "Also, add a short summary and a recommendation such as 'should be hired or not'.\n\n"
+)
+
+PROMPT_TIER_LIST = (
+    "University tier list example:\n"
+    "Tier 1: Bogazici University, Middle East Technical University (METU/ODTU), Istanbul Technical University (ITU), Bilkent University, Koc University\n"
+    "Tier 2: Sabanci University, Hacettepe University, Yildiz Technical University, Ankara University\n"
+    "Tier 3: ...\n"
+    "Tier 4: ...\n"
+    "Tier 5: ...\n"
+)
+
+# Puanlamaya katkısı olmayan iş ilanı bölümleri, kompakt modda gönderilmez
+COMPACT_DROPPED_JOB_SECTIONS = ('about_company', 'mission', 'benefits')
+# Token bütçesi ne kadar dar olursa olsun her bölümden en az bu kadar karakter kalır
+COMPACT_MIN_SECTION_CHARS = 200
+
+def estimate_tokens(text):
+    # Kaba tahmin: ortalama ~4 karakter = 1 token
+    return (len(text) + 3) // 4
+
+def estimate_payload_tokens(payload):
+    return sum(
+        estimate_tokens(part.get("text", ""))
+        for content in payload.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+def _format_sections(sections):
+    return "\n".join(f"[{name}]\n{text.strip()}" for name, text in sections)
+
+def _trim_sections(sections, max_chars):
+    """
+    Toplam uzunluk max_chars'ı aşıyorsa en uzun bölümlerden başlayarak kırpar.
+    Kısa bölümler olduğu gibi kalır, uzun bölümler ortak bir üst sınıra indirilir.
+    """
+    lengths = sorted(len(text) for _, text in sections)
+    if sum(lengths) <= max_chars:
+        return sections
+    cap = 0
+    remaining = max_chars
+    for i, length in enumerate(lengths):
+        share = remaining // (len(lengths) - i)
+        if length > share:
+            cap = share
+            break
+        remaining -= length
+    trimmed = []
+    for name, text in sections:
+        if len(text) > cap:
+            # Mümkünse satır sonunda kes
+            cut = text.rfind("\n", 0, cap)
+            text = text[:cut if cut > cap // 2 else cap]
+        trimmed.append((name, text))
+    return trimmed
+
+def compact_prompt_keywords(job_sections):
+    # İlanda tanınan anahtar kelime yoksa tüm liste gönderilir
+    return sorted(KEYWORD_MAP[kw] for kw in extract_keywords_from_job(job_sections)) or KEYWORDS
+
+def build_compact_gemini_prompt(job_sections, cv_sections, keywords=None, token_budget=None):
+    """
+    Daha az token harcayan prompt: sadece ilana ait anahtar kelimeler, puanlamada
+    kullanılmayan bölümler olmadan ve isteğe bağlı token bütçesine sığacak şekilde.
+    """
+    if keywords is None:
+        keywords = compact_prompt_keywords(job_sections)
+    job = [(name, text) for name, text in job_sections.items()
+           if name not in COMPACT_DROPPED_JOB_SECTIONS and isinstance(text, str) and text.strip()]
+    cv = [(name, text) for name, text in cv_sections.items() if isinstance(text, str) and text.strip()]
+    keyword_text = ", ".join(keywords)
+
+    def render(job, cv):
+        return (
+            PROMPT_INSTRUCTIONS +
+            f"Job Posting Sections:\n{_format_sections(job)}\n\n"
+            f"CV Sections:\n{_format_sections(cv)}\n\n"
+            f"Keywords:\n{keyword_text}\n" +
+            PROMPT_TIER_LIST
+        )
+
+    if token_budget:
+        # Sabit kısımlardan artan karakterler bölümlere paylaştırılır
+        fixed_chars = len(render([(name, "") for name, _ in job], [(name, "") for name, _ in cv]))
+        # Sabit kısım bütçeyi tek başına aşsa bile bölümler boşaltılmaz
+        min_chars = sum(min(len(text), COMPACT_MIN_SECTION_CHARS) for _, text in job + cv)
+        trimmed = _trim_sections(job + cv, max(min_chars, token_budget * 4 - fixed_chars))
+        job, cv = trimmed[:len(job)], trimmed[len(job):]
+        prompt = render(job, cv)
+        if estimate_tokens(prompt) > token_budget:
+            logger.warning("Compact prompt needs ~%d tokens, over the %d token budget (%d keywords)",
+                           estimate_tokens(prompt), token_budget, len(keywords))
+        return prompt
+    return render(job, cv)
+
+def build_gemini_prompt(job_sections, cv_sections, keywords=None, compact=False, token_budget=None):
+
+    if compact:
+        return build_compact_gemini_prompt(job_sections, cv_sections, keywords, token_budget)
 
     if keywords is None:
         keywords = KEYWORDS
     prompt = (
-        "Below are the sections of a job posting and a CV, a list of keywords, and scoring rules.\n"
-        "For each keyword:\n"
-        "- Assign a score (0, 1, 3, 5).\n"
-        "- Indicate the source: 'work experience', 'skills', 'other' (e.g., if found in work experience section, use 'work experience'; if in skills, use 'skills'; if only in CV but not in those sections, use 'other'; if not found, use 'none').\n"
-        "Additionally, evaluate education:\n"
-        "- If the department(s) required by the job match the candidate's degree, add a department score.\n"
-        "- Score the university based on the following tier list:\n"
-        "  * Tier 1 (top universities): 10 points\n"
-        "  * Tier 2: 8 points\n"
-        "  * Tier 3: 5 points\n"
-        "  * Tier 4: 3 points\n"
-        "  * Tier 5: 2 points\n"
-        "- Indicate the university's tier and whether the department matches.\n"
-        "Also, evaluate work experience years:\n"
-        "- Only consider full-time, professional work experience (do NOT include internships, education, part-time, or freelance jobs).\n"
-        "- For each job in the CV's work experience section, extract the start and end dates (month and year).\n"
-        "- For each job, calculate the duration in months by subtracting the start date from the end date. If the end date is 'Present' or 'Current', use the current date.\n"
-        "- Sum up all durations to get the total professional work experience in years (round to the nearest half year).\n"
-        "- If dates are missing or unclear, ignore that job.\n"
-        "- Do NOT guess or assume experience if dates are not explicit.\n"
-        "- Report the total professional work experience in years.\n"
-        "- If the job posting specifies required years of experience, compare it to the candidate's total years of professional work experience.\n"
-        "- Scoring for experience years:\n"
-        "  * Exact match (e.g., 5 years required, 5 years in CV): 30 points\n"
-        "  * Close match (e.g., 5 years required, 4 or 6 years in CV): 20 points\n"
-        "  * Distant match (e.g., 5 years required, 2-3 or 7-8 years in CV): 5 points\n"
-        "  * Very distant or missing (1 year or none): 0 points\n"
-        "- Indicate both the required and found years, and the match type.\n"
-        "Return a very short and clear JSON. Example format:\n"
-        "{\n"
-        "  \"keywords\": {\n"
-        "    \"React\": {\"score\": 5, \"source\": \"work experience\"},\n"
-        "    ...\n"
-        "  },\n"
-        "  \"education\": {\n"
-        "    \"university\": \"Bogazici University\",\n"
-        "    \"tier\": 1,\n"
-        "    \"score\": 10,\n"
-        "    \"department_match\": true,\n"
-        "    \"department_score\": 5\n"
-        "  },\n"
-        "  \"experience_years\": {\n"
-        "    \"required\": 5,\n"
-        "    \"found\": 5,\n"
-        "    \"match_type\": \"exact\",\n"
-        "    \"score\": 30\n"
-        "  },\n"
-        "  \"total_score\": 65,\n"
-        "  \"summary\": \"The candidate scored 65 points. The university and department are a great fit. Experience matches exactly. Technically strong, should be invited for an interview.\"\n"
-        "}\n"
-        "Also, add a short summary and a recommendation such as 'should be hired or not'.\n\n"
+        PROMPT_INSTRUCTIONS +
         f"Job Posting Sections:\n{job_sections}\n\n"
         f"CV Sections:\n{cv_sections}\n\n"
-        f"Keywords:\n{keywords}\n"
-        "University tier list example:\n"
-        "Tier 1: Bogazici University, Middle East Technical University (METU/ODTU), Istanbul Technical University (ITU), Bilkent University, Koc University\n"
-        "Tier 2: Sabanci University, Hacettepe University, Yildiz Technical University, Ankara University\n"
-        "Tier 3: ...\n"
-        "Tier 4: ...\n"
-        "Tier 5: ...\n"
+        f"Keywords:\n{keywords}\n" +
+        PROMPT_TIER_LIST
     )
     return prompt
 
-def build_gemini_payload(job_sections, cv_sections, keywords=None):
+def build_gemini_payload(job_sections, cv_sections, keywords=None, compact=False, token_budget=None):
  
-    prompt = build_gemini_prompt(job_sections, cv_sections, keywords)
+    prompt = build_gemini_prompt(job_sections, cv_sections, keywords, compact, token_budget)
     return {
         "contents": [
             {
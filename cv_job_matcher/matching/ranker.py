@@ -0,0 +1,207 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from cv_job_matcher import config
+from cv_job_matcher.matching.matcher import (
+    CVIndex, KEYWORD_INDEX, KEYWORD_MAP, resolve_skill_engine, load_skill_extractor,
+    extract_keywords_from_job, tokenize_section
+)
+from cv_job_matcher.utils.metrics import span
+
+# Bölüm bitleri: bir anahtar kelimenin CV'de hangi bölümlerde geçtiği
+SKILLS = 1
+WORK = 2
+TIER = 4
+ANYWHERE = 8
+
+def _progressive_score(mask: int) -> int:
+    # match_and_score ile aynı 3/5/2/1 kuralları
+    if mask & WORK:
+        return 5
+    if mask & SKILLS:
+        return 3
+    if mask & TIER:
+        return 2
+    if mask & ANYWHERE:
+        return 1
+    return 0
+
+SCORE_TABLE = np.array([_progressive_score(mask) for mask in range(16)], dtype=np.int32)
+
+def _section_bit(section: str) -> int:
+    if section == 'skills':
+        return SKILLS | ANYWHERE
+    if section == 'work_and_employment':
+        return WORK | ANYWHERE
+    if section in CVIndex.TIER_SECTIONS:
+        return TIER | ANYWHERE
+    return ANYWHERE
+
+class CVCorpus:
+    """
+    Toplu sıralama için CV havuzu.
+    Her CV eklenirken tokenları bir kez KEYWORDS listesiyle eşleştirilir ve
+    anahtar kelime -> (CV satırı, bölüm maskesi) listeleri tutulur. Sıralama
+    sırasında CV x anahtar kelime maske matrisi NumPy ile kurulup puanlanır.
+    engine="embedding" ise bölümlerdeki anahtar kelimeler SkillExtractor ile bulunur.
+    max_cvs verilirse havuz bu boyutu aştığında en eski CV'ler toplu olarak çıkarılır.
+    """
+
+    def __init__(self, threshold: float = 0.8, engine: Optional[str] = None, max_cvs: int = 0):
+        self.threshold = threshold
+        self.engine = resolve_skill_engine(engine)
+        self.max_cvs = max_cvs
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._token_keywords: Dict[str, tuple] = {}
+        self._postings = defaultdict(lambda: ([], []))
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, cv_id):
+        return cv_id in self._rows
+
+    def _keywords_for_token(self, token: str) -> tuple:
+        keywords = self._token_keywords.get(token)
+        if keywords is None:
+            keywords = tuple(KEYWORD_INDEX.all_matches(token, self.threshold, reverse=True))
+            self._token_keywords[token] = keywords
+        return keywords
+
+    def _section_masks(self, cv_sections: Dict[str, str]) -> Dict[str, int]:
+        masks = defaultdict(int)
+        if self.engine == "embedding":
+            for section, keywords in load_skill_extractor().extract_sections(cv_sections).items():
+                bit = _section_bit(section)
+                for kw in keywords:
+                    masks[kw] |= bit
+            return masks
+        for section, text in cv_sections.items():
+            bit = _section_bit(section)
+            for token in set(tokenize_section(text)):
+                for kw in self._keywords_for_token(token):
+                    masks[kw] |= bit
+        return masks
+
+    def add(self, cv_id: str, cv_sections: Dict[str, str]) -> None:
+        if cv_id in self._rows:
+            return
+        # Embedding çıkarımı kilit dışında yapılır, eşzamanlı eklemeler birbirini beklemez
+        masks = self._section_masks(cv_sections) if self.engine == "embedding" else None
+        with self._lock:
+            if cv_id in self._rows:
+                return
+            if masks is None:
+                masks = self._section_masks(cv_sections)
+            row = len(self.ids)
+            self.ids.append(cv_id)
+            self._rows[cv_id] = row
+            for kw, mask in masks.items():
+                rows, values = self._postings[kw]
+                rows.append(row)
+                values.append(mask)
+            if self.max_cvs and len(self.ids) > self.max_cvs:
+                # Her eklemede değil, havuzun %10'u kadar yer açılarak seyrek çalışır
+                self._evict_oldest(len(self.ids) - self.max_cvs + self.max_cvs // 10)
+
+    def _evict_oldest(self, count: int) -> None:
+        # Kilit altında çağrılır; kalan satırlar count kadar kaydırılır
+        self.ids = self.ids[count:]
+        self._rows = {cv_id: row for row, cv_id in enumerate(self.ids)}
+        postings = defaultdict(lambda: ([], []))
+        for kw, (rows, values) in self._postings.items():
+            kept = [(row - count, mask) for row, mask in zip(rows, values) if row >= count]
+            if kept:
+                postings[kw] = ([row for row, _ in kept], [mask for _, mask in kept])
+        self._postings = postings
+        self._arrays = {}
+
+    def _keyword_arrays(self, kw: str):
+        rows, values = self._postings.get(kw, ([], []))
+        cached = self._arrays.get(kw)
+        if cached is None or len(cached[0]) != len(rows):
+            cached = (np.array(rows, dtype=np.int64), np.array(values, dtype=np.uint8))
+            self._arrays[kw] = cached
+        return cached
+
+    def mask_matrix(self, keywords: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Maske matrisini ve satırlarına karşılık gelen CV kimliklerini aynı kilit
+        altında döner; sıralama sırasında eklenen CV'ler bu görüntüye girmez.
+        """
+        with self._lock:
+            ids = self.ids[:]
+            matrix = np.zeros((len(ids), len(keywords)), dtype=np.uint8)
+            for j, kw in enumerate(keywords):
+                rows, values = self._keyword_arrays(kw)
+                matrix[rows, j] = values
+            return matrix, ids
+
+    def rank(self, keywords: List[str], top_k: int = 10, cv_ids: Optional[List[str]] = None) -> List[dict]:
+        """
+        Normalize edilmiş iş ilanı anahtar kelimelerine göre en iyi top_k CV'yi döner.
+        """
+        matrix, ids = self.mask_matrix(keywords)
+        scores = SCORE_TABLE[matrix]
+        totals = scores.sum(axis=1)
+        count = matrix.shape[0]
+        rows = np.arange(count)
+        if cv_ids is not None:
+            rows = [self._rows.get(cv_id) for cv_id in cv_ids]
+            if not all(row is not None and row < count and ids[row] == cv_id for row, cv_id in zip(rows, cv_ids)):
+                # Görüntüden sonra CV eklendiyse ya da eski CV'ler çıkarılıp satırlar kaydıysa
+                # kimlikler görüntünün kendisinden eşlenir; görüntüde olmayanlar atlanır
+                positions = {cv_id: row for row, cv_id in enumerate(ids)}
+                rows = [positions.get(cv_id) for cv_id in cv_ids]
+            rows = np.array([row for row in rows if row is not None], dtype=np.int64)
+        if len(rows) == 0 or top_k <= 0:
+            return []
+        # Eşit puanlarda havuzdaki sıra korunur (stable sort)
+        top = np.argsort(-totals[rows], kind='stable')[:top_k]
+        results = []
+        for i in top:
+            row = int(rows[i])
+            results.append({
+                'cv_id': ids[row],
+                'total_score': int(totals[row]),
+                'keyword_scores': {KEYWORD_MAP[kw]: int(scores[row, j]) for j, kw in enumerate(keywords)},
+            })
+        return results
+
+# Süreç ömrü boyunca yaşayan, CORPUS_MAX_CVS ile sınırlı havuz; diske yazılmaz
+_corpus = None
+_corpus_lock = threading.Lock()
+
+def get_cv_corpus() -> CVCorpus:
+    global _corpus
+    if _corpus is None:
+        with _corpus_lock:
+            if _corpus is None:
+                _corpus = CVCorpus(max_cvs=config.CORPUS_MAX_CVS)
+    return _corpus
+
+def rank_candidates(job_sections, cvs=None, top_k=10, threshold=0.8, corpus: Optional[CVCorpus] = None, cv_ids=None):
+    """
+    Bir iş ilanını çok sayıda CV ile karşılaştırıp en iyi top_k adayı döner.
+    cvs: {cv_id: cv_sections} sözlüğü; corpus'a eklenir ve sadece bu CV'ler sıralanır.
+    cv_ids: corpus içinden sıralanacak CV'ler. İkisi de verilmezse tüm corpus sıralanır.
+    """
+    if corpus is None:
+        corpus = CVCorpus(threshold)
+    elif corpus.threshold != threshold:
+        raise ValueError(f"Corpus threshold {corpus.threshold} does not match {threshold}")
+    keywords = sorted(extract_keywords_from_job(job_sections, threshold, corpus.engine))
+    if cvs is not None:
+        for cv_id, cv_sections in cvs.items():
+            corpus.add(cv_id, cv_sections)
+        cv_ids = list(cvs)
+    with span("rank"):
+        candidates = corpus.rank(keywords, top_k, cv_ids)
+    return {
+        'keywords': [KEYWORD_MAP[kw] for kw in keywords],
+        'candidates': candidates,
+    }
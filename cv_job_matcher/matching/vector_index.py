@@ -0,0 +1,355 @@
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from cv_job_matcher import config
+from cv_job_matcher.utils.metrics import span
+from cv_job_matcher.utils.model_registry import get_model
+
+DOCUMENT = "document"
+# Eşleşmeye katkısı olmayan iş ilanı bölümleri sorgu vektörüne katılmaz
+QUERY_DROPPED_JOB_SECTIONS = ('about_company', 'mission', 'benefits')
+
+_index = None
+_index_lock = threading.Lock()
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def _nearest(centroids: np.ndarray, vectors: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        scores = np.asarray(vectors[start:start + chunk]) @ centroids.T
+        out[start:start + chunk] = np.argmax(scores, axis=1)
+    return out
+
+def embed_sections(sections: Dict[str, str], model_name: Optional[str] = None,
+                   dropped: Tuple[str, ...] = ()) -> Tuple[Optional[np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Dolu bölümleri tek batch'te encode eder; (doküman vektörü, bölüm -> vektör) döner.
+    Modelin girdi uzunluğu sınırlı olduğundan doküman vektörü, tüm metni kırpmak
+    yerine bölüm vektörlerinin normalize ortalamasıdır. Worker havuzunda çalışabilir.
+    """
+    names = [name for name, text in sections.items()
+             if name not in dropped and isinstance(text, str) and text.strip()]
+    if not names:
+        return None, {}
+    with span("model_encode"):
+        vectors = get_model(model_name).encode(
+            [sections[name] for name in names], batch_size=64,
+            convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+    document = _normalize_rows(vectors.mean(axis=0))
+    return document, dict(zip(names, vectors))
+
+def embed_job(job_sections: Dict[str, str], model_name: Optional[str] = None) -> Optional[np.ndarray]:
+    document, _ = embed_sections(job_sections, model_name, QUERY_DROPPED_JOB_SECTIONS)
+    return document
+
+class VectorStore:
+    """
+    Diskte append-only tutulan vektör matrisi ve satır -> CV kimliği eşlemesi.
+    vectors.f32 ham float32 satırlardan oluşur ve memory-map ile okunur; ids.txt
+    her satırın CV kimliğini tutar. Süreç yarım bir ekleme sırasında ölürse
+    açılışta iki dosya da ortak satır sayısına kırpılır.
+
+    Satır sayısı ivf_min_rows'a ulaşınca vektörler k-means ile kümelenir (IVF):
+    arama sadece sorguya en yakın nprobe kümenin satırlarını tarar.
+    Tek yazıcı varsayılır (tek süreç); okumalar kilitsizdir.
+    """
+
+    def __init__(self, directory: str, dim: int, ivf_min_rows: int = 20000):
+        self.directory = directory
+        self.dim = dim
+        self.ivf_min_rows = ivf_min_rows
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._ids_path = os.path.join(directory, "ids.txt")
+        self._centroids_path = os.path.join(directory, "ivf_centroids.npy")
+        self._assign_path = os.path.join(directory, "ivf_assign.i32")
+        self._lock = threading.Lock()
+        self._train_lock = threading.Lock()
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._mapped = None
+        self._centroids = None
+        self._trained_rows = 0
+        self._assign: List[int] = []
+        self._lists = None
+        self._load()
+        self._vectors_file = open(self._vectors_path, 'ab')
+        self._ids_file = open(self._ids_path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        data = b""
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, 'rb') as f:
+                data = f.read()
+        # Son parça ya boştur ya da yarım yazılmış bir satırdır
+        lines = data.split(b"\n")[:-1]
+        row_bytes = self.dim * 4
+        vector_bytes = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        n = min(len(lines), vector_bytes // row_bytes)
+        if vector_bytes != n * row_bytes:
+            os.truncate(self._vectors_path, n * row_bytes)
+        clean = b"".join(line + b"\n" for line in lines[:n])
+        if data != clean:
+            with open(self._ids_path, 'wb') as f:
+                f.write(clean)
+        self.ids = [line.decode('utf-8') for line in lines[:n]]
+        self._rows = {cv_id: row for row, cv_id in enumerate(self.ids)}
+        if os.path.exists(self._centroids_path):
+            self._centroids = np.load(self._centroids_path)
+            assign = np.empty(0, dtype=np.int32)
+            if os.path.exists(self._assign_path):
+                assign = np.fromfile(self._assign_path, dtype=np.int32)[:n]
+            self._trained_rows = len(assign)
+            missing = _nearest(self._centroids, self.vectors()[len(assign):])
+            self._assign = list(assign) + list(missing)
+            with open(self._assign_path, 'wb') as f:
+                np.asarray(self._assign, dtype=np.int32).tofile(f)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, cv_id):
+        return cv_id in self._rows
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def vectors(self) -> np.ndarray:
+        n = len(self.ids)
+        mapped = self._mapped
+        if mapped is None or mapped.shape[0] != n:
+            if n == 0:
+                return np.empty((0, self.dim), dtype=np.float32)
+            mapped = np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(n, self.dim))
+            self._mapped = mapped
+        return mapped
+
+    def add(self, cv_id: str, vector: np.ndarray) -> bool:
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            if cv_id in self._rows:
+                return False
+            # Önce vektör, sonra kimlik: yarım kalan ekleme açılışta kırpılır
+            self._vectors_file.write(vector.tobytes())
+            self._vectors_file.flush()
+            self._ids_file.write(cv_id + "\n")
+            self._ids_file.flush()
+            if self._centroids is not None:
+                cluster = int(_nearest(self._centroids, vector[None, :])[0])
+                self._assign.append(cluster)
+                with open(self._assign_path, 'ab') as f:
+                    np.array([cluster], dtype=np.int32).tofile(f)
+                self._lists = None
+            self._rows[cv_id] = len(self.ids)
+            self.ids.append(cv_id)
+            return True
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, sample_size: Optional[int] = None, seed: int = 0) -> None:
+        """
+        Küresel k-means ile IVF kümelerini oluşturur ve tüm satırları kümelere atar.
+        Kümeleme kilit dışında o anki satırlar üzerinde yapılır; bu sırada eklenenler sonda atanır.
+        """
+        n = len(self.ids)
+        if n == 0:
+            return
+        nlist = min(nlist or max(1, int(np.sqrt(n))), n)
+        rng = np.random.default_rng(seed)
+        vectors = self.vectors()[:n]
+        sample_size = min(n, sample_size or 64 * nlist)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            # Boş kalan kümeler rastgele örneklerle yeniden başlatılır
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize_rows(sums).astype(np.float32)
+        assign = _nearest(centroids, vectors)
+        with self._lock:
+            assign = np.concatenate([assign, _nearest(centroids, self.vectors()[n:])])
+            np.save(self._centroids_path, centroids)
+            with open(self._assign_path, 'wb') as f:
+                assign.astype(np.int32).tofile(f)
+            self._assign = list(assign)
+            self._centroids = centroids
+            self._trained_rows = n
+            self._lists = None
+
+    def _inverted_lists(self, centroids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Küme -> satır listeleri: satırlar kümeye göre sıralanır, offsets küme sınırlarıdır
+        lists = self._lists
+        assign = self._assign
+        if lists is None or lists[0] is not centroids or lists[2][-1] != len(assign):
+            assign = np.asarray(assign, dtype=np.int32)
+            order = np.argsort(assign, kind='stable').astype(np.int64)
+            offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assign, minlength=len(centroids)), out=offsets[1:])
+            lists = (centroids, order, offsets)
+            self._lists = lists
+        return lists[1], lists[2]
+
+    def needs_training(self) -> bool:
+        # Yeterli veri biriktiğinde ya da havuz eğitildiği boyutun 4 katına çıktığında (yeniden) eğit
+        n = len(self.ids)
+        return n >= self.ivf_min_rows and (not self.trained or n >= 4 * self._trained_rows)
+
+    def maybe_train(self) -> None:
+        """
+        Gerekirse IVF'yi arka planda eğitir; bitene kadar aramalar exact yapılır.
+        """
+        if not self.needs_training() or not self._train_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                if self.needs_training():
+                    self.train()
+            finally:
+                self._train_lock.release()
+
+        threading.Thread(target=run, name="cvm-ivf-train", daemon=True).start()
+
+    def search(self, query: np.ndarray, top_k: int = 10, mode: str = "auto",
+               nprobe: Optional[int] = None) -> Tuple[List[Tuple[str, float]], int, str]:
+        """
+        Sorguya en yakın top_k (cv_id, cosine benzerliği) çiftini, taranan satır sayısını
+        ve kullanılan yöntemi döner. mode: "exact" (tüm satırlar), "ivf" (en yakın nprobe
+        küme; eğitilmediyse exact) veya "auto" (ivf ile aynı).
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        if mode not in ("auto", "exact", "ivf"):
+            raise ValueError(f"Unsupported search mode: {mode}")
+        vectors = self.vectors()
+        n = vectors.shape[0]
+        centroids = self._centroids
+        used = "exact" if mode == "exact" or centroids is None else "ivf"
+        if n == 0 or top_k <= 0:
+            return [], 0, used
+        if used == "exact":
+            rows = None
+            scores = vectors @ query
+        else:
+            order, offsets = self._inverted_lists(centroids)
+            nprobe = min(nprobe or config.VECTOR_IVF_NPROBE, len(centroids))
+            centroid_scores = centroids @ query
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            rows = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe]))
+            rows = rows[rows < n]
+            scores = vectors[rows] @ query
+        k = min(top_k, len(scores))
+        if k == 0:
+            return [], 0, used
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        results = [(self.ids[int(rows[i] if rows is not None else i)], float(scores[i])) for i in top]
+        return results, len(scores), used
+
+    def close(self) -> None:
+        self._vectors_file.close()
+        self._ids_file.close()
+
+class CVVectorIndex:
+    """
+    CV'lerin doküman ve bölüm embedding'lerini tutan kalıcı indeks.
+    Her alan ("document", "skills", "work_and_employment", ...) ayrı bir
+    VectorStore'dur; böylece bölüm bazlı arama filtre maliyeti olmadan yapılır.
+    Dizin model adına göre ayrılır, model değişince eski vektörler kullanılmaz.
+    """
+
+    def __init__(self, directory: str, model_name: Optional[str] = None, ivf_min_rows: int = 20000):
+        self.model_name = model_name
+        model_key = hashlib.sha256((model_name or config.EMBEDDING_MODEL_NAME).encode('utf-8')).hexdigest()[:16]
+        self.directory = os.path.join(directory, model_key)
+        self.ivf_min_rows = ivf_min_rows
+        self.dim = None
+        self._stores: Dict[str, VectorStore] = {}
+        self._lock = threading.Lock()
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                dim_path = os.path.join(self.directory, name, "dim")
+                if os.path.exists(dim_path):
+                    with open(dim_path, 'r') as f:
+                        self.dim = int(f.read().strip())
+                    self._stores[name] = VectorStore(os.path.join(self.directory, name), self.dim, ivf_min_rows)
+
+    def _store(self, field: str, create: bool = False) -> Optional[VectorStore]:
+        name = re.sub(r'[^a-z0-9_]', '_', field.lower())
+        store = self._stores.get(name)
+        if store is None and create:
+            with self._lock:
+                store = self._stores.get(name)
+                if store is None:
+                    path = os.path.join(self.directory, name)
+                    os.makedirs(path, exist_ok=True)
+                    with open(os.path.join(path, "dim"), 'w') as f:
+                        f.write(str(self.dim))
+                    store = VectorStore(path, self.dim, self.ivf_min_rows)
+                    self._stores[name] = store
+        return store
+
+    def __len__(self):
+        store = self._stores.get(DOCUMENT)
+        return len(store) if store is not None else 0
+
+    def __contains__(self, cv_id):
+        store = self._stores.get(DOCUMENT)
+        return store is not None and cv_id in store
+
+    def fields(self) -> List[str]:
+        return sorted(self._stores)
+
+    def add(self, cv_id: str, document: Optional[np.ndarray], sections: Dict[str, np.ndarray]) -> bool:
+        """
+        embed_sections çıktısını indekse ekler. CV zaten varsa hiçbir şey yapmaz.
+        """
+        if document is None or cv_id in self:
+            return False
+        if self.dim is None:
+            self.dim = int(document.shape[-1])
+        for field, vector in sections.items():
+            self._store(field, create=True).add(cv_id, vector)
+        # Doküman en son eklenir; varlık kontrolü buna bakar
+        store = self._store(DOCUMENT, create=True)
+        added = store.add(cv_id, document)
+        for field_store in list(self._stores.values()):
+            field_store.maybe_train()
+        return added
+
+    def search(self, query: np.ndarray, top_k: int = 10, field: str = DOCUMENT, mode: str = "auto",
+               nprobe: Optional[int] = None) -> Dict:
+        store = self._store(field)
+        if store is None or query is None:
+            return {"field": field, "mode": mode, "searched": 0, "candidates": []}
+        with span("vector_search"):
+            results, searched, used = store.search(query, top_k, mode, nprobe)
+        return {
+            "field": field,
+            "mode": used,
+            "searched": searched,
+            "candidates": [{"cv_id": cv_id, "score": round(score, 6)} for cv_id, score in results],
+        }
+
+    def stats(self) -> Dict:
+        return {name: {"rows": len(store), "ivf": store.trained} for name, store in self._stores.items()}
+
+    def close(self) -> None:
+        for store in self._stores.values():
+            store.close()
+
+def get_cv_vector_index() -> CVVectorIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CVVectorIndex(config.VECTOR_INDEX_DIR, ivf_min_rows=config.VECTOR_IVF_MIN_ROWS)
+    return _index
@@ -1,10 +1,13 @@
+import hashlib
+import io
 import os
-from typing import Dict, Any, Optional
-import pdfplumber
-import docx
+from typing import Dict, Any, BinaryIO, Optional, Union
 import re
-from sentence_transformers import SentenceTransformer, util
-import numpy as np
+from cv_job_matcher import config
+from cv_job_matcher.parsers.header_classifier import get_header_classifier, split_sections, split_sections_stream
+from cv_job_matcher.parsers.pdf_extract import iter_pdf_pages, load_backend
+from cv_job_matcher.utils.metrics import span, timed_iter
+from cv_job_matcher.utils.parse_cache import get_parse_cache, file_digest
 
 SECTION_HEADERS = {
     "objective": (
@@ -46,20 +49,28 @@ SECTION_HEADERS = {
     )
 }
 
-def parse_txt(file_path: str) -> str:
+# Dosya yolu veya okunabilir binary dosya nesnesi (ör. SpooledTemporaryFile)
+Source = Union[str, BinaryIO]
+
+def parse_txt(file_path: Source) -> str:
+    if not isinstance(file_path, (str, os.PathLike)):
+        return file_path.read().decode('utf-8')
     with open(file_path, 'r', encoding='utf-8') as f:
         return f.read()
 
-def parse_pdf(file_path: str) -> str:
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
+def parse_pdf(file_path: Source) -> str:
+    return "".join(page + "\n" for page in timed_iter(iter_pdf_pages(file_path), "pdf_extract"))
+
+def parse_docx(file_path: Source) -> str:
+    import docx
+    with span("docx_extract"):
+        doc = docx.Document(file_path)
+        return "\n".join([para.text for para in doc.paragraphs])
 
-def parse_docx(file_path: str) -> str:
-    doc = docx.Document(file_path)
-    return "\n".join([para.text for para in doc.paragraphs])
+def load_parser_backends() -> None:
+    # python-docx ve PDF backend'i lazy import edilir; warmup'ta önceden yüklenir
+    import docx  # noqa: F401
+    load_backend()
 
 def detect_filetype(file_path: str) -> str:
     ext = os.path.splitext(file_path)[1].lower()
@@ -72,53 +83,68 @@ def detect_filetype(file_path: str) -> str:
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
-def find_header_with_transformer(line: str, all_headers: list, model, threshold: float = 0.93) -> Optional[str]:
+def extract_sections_transformer(text: str, model_name: Optional[str] = None, threshold: float = 0.7) -> Dict[str, str]:
+    classifier = get_header_classifier('cv', SECTION_HEADERS, model_name)
+    return split_sections(text, classifier, threshold)
 
-    line_emb = model.encode(line, convert_to_tensor=True)
-    headers_emb = model.encode(all_headers, convert_to_tensor=True)
-    cos_scores = util.pytorch_cos_sim(line_emb, headers_emb)[0].cpu()
-    best_idx = int(np.argmax(cos_scores))
-    best_score = float(cos_scores[best_idx])
-    if best_score >= threshold:
-        return all_headers[best_idx]
-    return None
+def extract_sections_from_pages(pages, model_name: Optional[str] = None, threshold: float = 0.7) -> Dict[str, str]:
+    classifier = get_header_classifier('cv', SECTION_HEADERS, model_name)
+    return split_sections_stream(pages, classifier, threshold)
 
-def extract_sections_transformer(text: str, model_name: str = "paraphrase-MiniLM-L6-v2", threshold: float = 0.7) -> Dict[str, str]:
-    model = SentenceTransformer(model_name)
-    all_headers = []
-    header_to_section = {}
-    for section, headers in SECTION_HEADERS.items():
-        for h in headers:
-            all_headers.append(h)
-            header_to_section[h.lower()] = section
-    sections = {}
-    current_section = "general"
-    sections[current_section] = ""
-    for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        found_header = find_header_with_transformer(line, all_headers, model, threshold)
-        if found_header:
-            current_section = header_to_section.get(found_header.lower(), found_header)
-            if current_section not in sections:
-                sections[current_section] = ""
-        else:
-            sections[current_section] += line + "\n"
-    return sections
+def cv_fingerprint(model_name: Optional[str] = None) -> str:
+    """
+    CV parse önbelleğinin parmak izi: model ve başlık tablosuna ek olarak ham
+    metni değiştiren PDF backend'i ve sayfa sınırı da dahildir.
+    """
+    classifier = get_header_classifier('cv', SECTION_HEADERS, model_name)
+    return hashlib.sha256(
+        f"{classifier.fingerprint}|{config.PDF_BACKEND}|{config.PDF_MAX_PAGES}".encode('utf-8')
+    ).hexdigest()
 
-def parse_cv(file_path: str) -> Dict[str, Any]:
-    filetype = detect_filetype(file_path)
+def parse_cv(file_path: Source, content_hash: Optional[str] = None, use_cache: bool = True,
+             filename: Optional[str] = None, pdf_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    file_path bir dosya nesnesi ise dosya tipi filename'in uzantısından belirlenir.
+    pdf_workers verilmezse PDF sayfa paralelliği config.PDF_WORKERS'tan alınır.
+    """
+    filetype = detect_filetype(filename or file_path)
+    content_hash = content_hash or file_digest(file_path)
+    cache = get_parse_cache() if use_cache and config.PARSE_CACHE_ENABLED else None
+    if cache is not None:
+        # Aynı dosya tekrar yüklendiğinde parse işlemi atlanır
+        fingerprint = cv_fingerprint()
+        cached = cache.get('cv', content_hash, fingerprint)
+        if cached is not None:
+            # cv_id alanı olmadan yazılmış eski kayıtlar da aynı şekle getirilir
+            cached['cv_id'] = content_hash
+            return cached
     if filetype == 'pdf':
-        text = parse_pdf(file_path)
-    elif filetype == 'docx':
-        text = parse_docx(file_path)
-    elif filetype == 'txt':
-        text = parse_txt(file_path)
+        # Sayfalar çıkarıldıkça bölümlere ayrılır, ham metin de aynı anda biriktirilir
+        pages = []
+        def collect_pages():
+            # Sayfa çıkarımı sınıflandırmayla iç içe olduğundan her sayfa ayrı ölçülür
+            for page in timed_iter(iter_pdf_pages(file_path, workers=pdf_workers), "pdf_extract"):
+                pages.append(page + "\n")
+                yield page
+        sections = extract_sections_from_pages(collect_pages())
+        text = "".join(pages)
     else:
-        raise ValueError("Unsupported file type")
-    sections = extract_sections_transformer(text)
-    return {
+        if filetype == 'docx':
+            text = parse_docx(file_path)
+        elif filetype == 'txt':
+            text = parse_txt(file_path)
+        else:
+            raise ValueError("Unsupported file type")
+        sections = extract_sections_transformer(text)
+    result = {
+        'cv_id': content_hash,
         'raw_text': text,
         'sections': sections
     }
+    if cache is not None:
+        cache.put('cv', content_hash, fingerprint, result)
+    return result
+
+def parse_cv_bytes(data: bytes, filename: str, content_hash: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+    # Process havuzunda dosya nesnesi taşınamadığı için içerik byte olarak gönderilir
+    return parse_cv(io.BytesIO(data), content_hash=content_hash, use_cache=use_cache, filename=filename)
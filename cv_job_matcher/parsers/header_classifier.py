@@ -0,0 +1,135 @@
+import hashlib
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from cv_job_matcher import config
+from cv_job_matcher.utils.metrics import span
+from cv_job_matcher.utils.model_registry import get_model
+
+_classifiers: Dict[Tuple[str, Optional[str]], "HeaderClassifier"] = {}
+_classifiers_lock = threading.Lock()
+
+def normalize_header_line(line: str) -> str:
+    # "Work Experience:" -> "work experience"
+    line = line.strip().rstrip(':').strip().lower()
+    return re.sub(r'\s+', ' ', line)
+
+class HeaderClassifier:
+    """
+    Satırların bölüm başlığı olup olmadığını toplu (batch) olarak belirler.
+    Başlık embedding'leri bir kez hesaplanır ve saklanır; her doküman için
+    tek bir encode çağrısı ve tek bir matris çarpımı yapılır.
+    """
+
+    def __init__(self, section_headers: Dict[str, tuple], model_name: Optional[str] = None, batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.all_headers = []
+        self.header_to_section = {}
+        for section, headers in section_headers.items():
+            for h in headers:
+                self.all_headers.append(h)
+                self.header_to_section[h.lower()] = section
+        # Lexical hızlı yol: birebir başlık eşleşmeleri modele gitmez
+        self._exact = {}
+        for h in self.all_headers:
+            self._exact.setdefault(normalize_header_line(h), h)
+        # En uzun başlıktan belirgin şekilde uzun satırlar gövde metnidir
+        longest = max(len(h.split()) for h in self.all_headers)
+        self.max_header_words = longest + 2
+        self.max_header_chars = max(len(h) for h in self.all_headers) + 20
+        # Model veya başlık tablosu değişince önbellekteki parse sonuçları geçersiz olur
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [model_name or config.EMBEDDING_MODEL_NAME, section_headers], ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+        self._header_emb = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return get_model(self.model_name)
+
+    def header_embeddings(self) -> np.ndarray:
+        if self._header_emb is None:
+            with self._lock:
+                if self._header_emb is None:
+                    self._header_emb = self.model.encode(
+                        self.all_headers, batch_size=self.batch_size,
+                        convert_to_numpy=True, normalize_embeddings=True
+                    )
+        return self._header_emb
+
+    def is_candidate(self, line: str) -> bool:
+        # Uzun gövde satırlarını model çağrısından önce ele
+        return len(line) <= self.max_header_chars and len(line.split()) <= self.max_header_words
+
+    def encode_lines(self, lines: List[str]) -> np.ndarray:
+        with span("model_encode"):
+            return self.model.encode(
+                lines, batch_size=self.batch_size,
+                convert_to_numpy=True, normalize_embeddings=True
+            )
+
+    def classify(self, lines: List[str], threshold: float) -> List[Optional[str]]:
+        """
+        Her satır için eşleşen başlığı (veya None) döner.
+        """
+        results: List[Optional[str]] = [None] * len(lines)
+        pending = []
+        for i, line in enumerate(lines):
+            exact = self._exact.get(normalize_header_line(line))
+            if exact is not None:
+                results[i] = exact
+            elif self.is_candidate(line):
+                pending.append(i)
+        if pending:
+            line_emb = self.encode_lines([lines[i] for i in pending])
+            # Normalize edilmiş vektörlerde cosine benzerliği = iç çarpım
+            scores = line_emb @ self.header_embeddings().T
+            best_idx = np.argmax(scores, axis=1)
+            best_scores = scores[np.arange(len(pending)), best_idx]
+            for i, idx, score in zip(pending, best_idx, best_scores):
+                if score >= threshold:
+                    results[i] = self.all_headers[int(idx)]
+        return results
+
+    def section_of(self, header: str) -> str:
+        return self.header_to_section.get(header.lower(), header)
+
+def get_header_classifier(name: str, section_headers: Dict[str, tuple], model_name: Optional[str] = None) -> HeaderClassifier:
+    key = (name, model_name)
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        with _classifiers_lock:
+            classifier = _classifiers.get(key)
+            if classifier is None:
+                classifier = HeaderClassifier(section_headers, model_name)
+                _classifiers[key] = classifier
+    return classifier
+
+def split_sections_stream(chunks: Iterable[str], classifier: HeaderClassifier, threshold: float) -> Dict[str, str]:
+    """
+    Metni parça parça (ör. PDF sayfaları) bölümlere ayırır. Her parça tek bir
+    batch ile sınıflandırılır, böylece ilk parçalar sonrakiler hazır olmadan işlenir.
+    """
+    sections = {}
+    current_section = "general"
+    sections[current_section] = ""
+    for chunk in chunks:
+        lines = [line.strip() for line in chunk.splitlines()]
+        lines = [line for line in lines if line]
+        with span("section_split"):
+            found_headers = classifier.classify(lines, threshold)
+        for line, found_header in zip(lines, found_headers):
+            if found_header:
+                current_section = classifier.section_of(found_header)
+                if current_section not in sections:
+                    sections[current_section] = ""
+            else:
+                sections[current_section] += line + "\n"
+    return sections
+
+def split_sections(text: str, classifier: HeaderClassifier, threshold: float) -> Dict[str, str]:
+    return split_sections_stream([text], classifier, threshold)
@@ -1,7 +1,8 @@
 import re
 from typing import Dict, Optional
-from sentence_transformers import SentenceTransformer, util
-import numpy as np
+from cv_job_matcher import config
+from cv_job_matcher.parsers.header_classifier import get_header_classifier, split_sections
+from cv_job_matcher.utils.parse_cache import get_parse_cache, content_digest
 
 JOB_SECTION_HEADERS = {
     "about_company": (
@@ -55,46 +56,21 @@ JOB_SECTION_HEADERS = {
     )
 }
 
-def find_header_with_transformer(line: str, all_headers: list, model, threshold: float = 0.7) -> Optional[str]:
-    """
-    Verilen satırı, header adayları ile karşılaştırır ve benzerliği en yüksek olanı döner.
-    Eşik değerin altında ise None döner.
-    """
-    line_emb = model.encode(line, convert_to_tensor=True)
-    headers_emb = model.encode(all_headers, convert_to_tensor=True)
-    cos_scores = util.pytorch_cos_sim(line_emb, headers_emb)[0].cpu()
-    best_idx = int(np.argmax(cos_scores))
-    best_score = float(cos_scores[best_idx])
-    if best_score >= threshold:
-        return all_headers[best_idx]
-    return None
-
 # Sentence transformer ile header bulma destekli section extraction
 
-def extract_job_sections_transformer(text: str, model_name: str = "paraphrase-MiniLM-L6-v2", threshold: float = 0.93) -> Dict[str, str]:
-    model = SentenceTransformer(model_name)
-    all_headers = []
-    header_to_section = {}
-    for section, headers in JOB_SECTION_HEADERS.items():
-        for h in headers:
-            all_headers.append(h)
-            header_to_section[h.lower()] = section
-    sections = {}
-    current_section = "general"
-    sections[current_section] = ""
-    for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        found_header = find_header_with_transformer(line, all_headers, model, threshold)
-        if found_header:
-            current_section = header_to_section.get(found_header.lower(), found_header)
-            if current_section not in sections:
-                sections[current_section] = ""
-        else:
-            sections[current_section] += line + "\n"
-    return sections
+def extract_job_sections_transformer(text: str, model_name: Optional[str] = None, threshold: float = 0.93) -> Dict[str, str]:
+    classifier = get_header_classifier('job', JOB_SECTION_HEADERS, model_name)
+    return split_sections(text, classifier, threshold)
 
-def parse_job_posting(text: str) -> Dict[str, str]:
- 
-    return extract_job_sections_transformer(text)
+def parse_job_posting(text: str, use_cache: bool = True) -> Dict[str, str]:
+    if not (use_cache and config.PARSE_CACHE_ENABLED):
+        return extract_job_sections_transformer(text)
+    cache = get_parse_cache()
+    digest = content_digest(text)
+    fingerprint = get_header_classifier('job', JOB_SECTION_HEADERS).fingerprint
+    cached = cache.get('job', digest, fingerprint)
+    if cached is not None:
+        return cached['sections']
+    sections = extract_job_sections_transformer(text)
+    cache.put('job', digest, fingerprint, {'raw_text': text, 'sections': sections})
+    return sections
@@ -0,0 +1,120 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+from cv_job_matcher import config
+
+BACKENDS = ("pdfplumber", "pypdfium2")
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+def _open_source(source):
+    # Worker süreçlerine dosya yolu veya byte içerik gönderilir
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return source
+
+def load_backend(backend: Optional[str] = None):
+    # PDF kütüphaneleri ilk kullanımda import edilir; warmup bunu istek yolundan önce yapar
+    if (backend or config.PDF_BACKEND) == "pypdfium2":
+        import pypdfium2
+        return pypdfium2
+    import pdfplumber
+    return pdfplumber
+
+def _pdfplumber_pages(source, start: int, stop: Optional[int]) -> Iterator[str]:
+    import pdfplumber
+    with pdfplumber.open(_open_source(source)) as pdf:
+        for page in pdf.pages[start:stop]:
+            # Taranmış/boş sayfalarda extract_text() None döner
+            yield page.extract_text() or ""
+            page.close()
+
+def _pypdfium2_pages(source, start: int, stop: Optional[int]) -> Iterator[str]:
+    # Sadece metin çıkaran, pdfplumber'dan çok daha hızlı (layout analizi yapmayan) backend
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(_open_source(source))
+    try:
+        stop = len(pdf) if stop is None else min(stop, len(pdf))
+        for i in range(start, stop):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            yield textpage.get_text_range().replace("\r\n", "\n")
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+def _iter_range(source, start: int, stop: Optional[int], backend: str) -> Iterator[str]:
+    if backend == "pdfplumber":
+        return _pdfplumber_pages(source, start, stop)
+    if backend == "pypdfium2":
+        return _pypdfium2_pages(source, start, stop)
+    raise ValueError(f"Unsupported PDF backend: {backend}")
+
+def extract_page_range(source, start: int, stop: int, backend: str) -> List[str]:
+    return list(_iter_range(source, start, stop, backend))
+
+def page_count(source, backend: str) -> int:
+    if backend == "pypdfium2":
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(_open_source(source))
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    import pdfplumber
+    with pdfplumber.open(_open_source(source)) as pdf:
+        return len(pdf.pages)
+
+def _get_page_pool(workers: int) -> ProcessPoolExecutor:
+    global _page_pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                # Sunucuda torch thread'leri başladıktan sonra açılır; fork yerine spawn
+                _page_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _page_pool
+
+def iter_pdf_pages(source, max_pages: Optional[int] = None, backend: Optional[str] = None,
+                   workers: Optional[int] = None, parallel_min_pages: Optional[int] = None) -> Iterator[str]:
+    """
+    PDF sayfalarının metnini sırayla üreten generator.
+    Sayfa sayısı parallel_min_pages'e ulaşan dokümanlar sayfa gruplarına bölünüp
+    process havuzunda paralel çıkarılır; gruplar sırayla teslim edildiğinden
+    çağıran ilk sayfaları sonrakiler bitmeden işlemeye başlayabilir.
+    """
+    backend = backend or config.PDF_BACKEND
+    max_pages = config.PDF_MAX_PAGES if max_pages is None else max_pages
+    workers = config.PDF_WORKERS if workers is None else workers
+    parallel_min_pages = config.PDF_PARALLEL_MIN_PAGES if parallel_min_pages is None else parallel_min_pages
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported PDF backend: {backend}")
+
+    if workers <= 1:
+        # Tek worker: sayfa sayısını hesaplamadan doğrudan akıt
+        yield from _iter_range(source, 0, max_pages or None, backend)
+        return
+    if not isinstance(source, (str, os.PathLike, bytes)):
+        source = source.read()
+    total = page_count(source, backend)
+    if max_pages:
+        total = min(total, max_pages)
+    if total < parallel_min_pages:
+        yield from _iter_range(source, 0, total, backend)
+        return
+    pool = _get_page_pool(workers)
+    chunk = max(1, -(-total // (workers * 2)))
+    futures = [
+        pool.submit(extract_page_range, source, start, min(start + chunk, total), backend)
+        for start in range(0, total, chunk)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
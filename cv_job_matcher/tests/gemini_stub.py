@@ -0,0 +1,52 @@
+import asyncio
+import json
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+STUB_RESULT = {
+    "keywords": {"Python": {"score": 5, "source": "work experience"}},
+    "education": {"university": "Bogazici University", "tier": 1, "score": 10,
+                  "department_match": True, "department_score": 5},
+    "experience_years": {"required": 5, "found": 5, "match_type": "exact", "score": 30},
+    "total_score": 50,
+    "summary": "Stub response.",
+}
+
+class GeminiStub:
+    """
+    Gemini generateContent uç noktasını taklit eden yerel sunucu.
+    Gecikme ve ilk N isteği hata ile döndürme ayarlanabilir; yük testlerinde
+    eşzamanlı istek sayısını ölçer.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, fail_status: int = 503):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/v1beta/models/{model}:generateContent")(self.generate)
+
+    async def generate(self, model: str, request: Request):
+        self.calls += 1
+        call_number = self.calls
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            body = await request.json()
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if call_number <= self.fail_first:
+                return JSONResponse(status_code=self.fail_status, content={"error": "stub failure"})
+            prompt = body["contents"][0]["parts"][0]["text"]
+            return {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": json.dumps(STUB_RESULT)}]}}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 64},
+            }
+        finally:
+            self.in_flight -= 1
+
+# uvicorn cv_job_matcher.tests.gemini_stub:app --port 8153
+app = GeminiStub(latency=0.5).app
@@ -0,0 +1,158 @@
+"""
+Benchmark ve yük testleri için deterministik sentetik CV / iş ilanı üreticisi.
+Başlıklar gerçek SECTION_HEADERS / JOB_SECTION_HEADERS tablolarından, beceriler
+KEYWORDS listesinden seçilir; aynı seed her zaman aynı dokümanı üretir.
+"""
+import os
+import random
+from typing import Dict, List, Sequence, Tuple
+from cv_job_matcher.keywords import KEYWORDS
+from cv_job_matcher.parsers.cv_parser import SECTION_HEADERS
+from cv_job_matcher.parsers.job_parser import JOB_SECTION_HEADERS
+
+FIRST_NAMES = ("Ayşe", "Mehmet", "Elif", "Can", "Zeynep", "Emre", "Deniz", "Burak", "Selin", "Ahmet")
+LAST_NAMES = ("Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Aydın", "Öztürk", "Arslan", "Doğan", "Koç")
+COMPANIES = ("Trendyol", "Getir", "Peak Games", "Insider", "Papara", "Hepsiburada", "Aselsan", "Turkcell")
+ROLES = ("Backend Developer", "Frontend Developer", "Full Stack Developer", "DevOps Engineer",
+         "Data Engineer", "Mobile Developer", "Software Engineer", "QA Engineer")
+UNIVERSITIES = ("Bogazici University", "Middle East Technical University", "Istanbul Technical University",
+                "Bilkent University", "Hacettepe University", "Yildiz Technical University", "Ankara University")
+DEPARTMENTS = ("Computer Engineering", "Software Engineering", "Electrical and Electronics Engineering",
+               "Mathematics", "Industrial Engineering")
+VERBS = ("Developed", "Maintained", "Designed", "Migrated", "Optimized", "Led the rollout of", "Automated")
+OBJECTS = ("payment services", "an internal admin panel", "the search backend", "CI pipelines",
+           "a recommendation engine", "mobile checkout flows", "reporting dashboards")
+
+def _header(rng: random.Random, headers: Sequence[str]) -> str:
+    header = rng.choice(headers)
+    return rng.choice((header.title(), header.upper(), header.title() + ":"))
+
+def _skills(rng: random.Random, low: int, high: int) -> List[str]:
+    return rng.sample(KEYWORDS, rng.randint(low, high))
+
+def _work_entry(rng: random.Random) -> str:
+    start = rng.randint(2008, 2021)
+    end = rng.choice((str(rng.randint(start + 1, 2024)), "Present"))
+    lines = [f"{rng.choice(ROLES)} - {rng.choice(COMPANIES)} ({rng.choice(('Jan', 'Mar', 'Sep'))} {start} - {end})"]
+    for _ in range(rng.randint(2, 4)):
+        used = ", ".join(_skills(rng, 1, 3))
+        lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {used}")
+    return "\n".join(lines)
+
+def cv_sections(seed: int) -> Dict[str, str]:
+    """
+    Parse edilmiş CV'ye karşılık gelen bölüm -> metin sözlüğü (başlıklar hariç).
+    """
+    rng = random.Random(seed)
+    sections = {
+        'general': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}\n{rng.choice(('Istanbul', 'Ankara', 'Izmir'))}\n",
+        'objective': f"{rng.choice(ROLES)} with {rng.randint(1, 12)} years of experience.\n",
+        'work_and_employment': "\n".join(_work_entry(rng) for _ in range(rng.randint(1, 4))) + "\n",
+        'education_and_training': (
+            f"{rng.choice(UNIVERSITIES)} - {rng.choice(DEPARTMENTS)} ({rng.randint(2004, 2020)})\n"
+        ),
+        'skills': ", ".join(_skills(rng, 5, 15)) + "\n" + ", ".join(_skills(rng, 2, 6)) + "\n",
+    }
+    if rng.random() < 0.6:
+        sections['accomplishments'] = f"Personal project built with {', '.join(_skills(rng, 2, 4))}\n"
+    if rng.random() < 0.5:
+        sections['misc'] = f"Interests: {', '.join(_skills(rng, 1, 3))}, open source\n"
+    return sections
+
+def cv_text(seed: int) -> str:
+    rng = random.Random(seed + 1_000_003)
+    parts = []
+    for section, body in cv_sections(seed).items():
+        if section != 'general':
+            parts.append(_header(rng, SECTION_HEADERS[section]))
+        parts.append(body.rstrip("\n"))
+    return "\n".join(parts) + "\n"
+
+def job_sections(seed: int) -> Dict[str, str]:
+    rng = random.Random(seed)
+    required = _skills(rng, 4, 10)
+    return {
+        'about_company': f"{rng.choice(COMPANIES)} is one of the fastest growing technology companies in Turkey.\n",
+        'position': f"Senior {rng.choice(ROLES)}\n",
+        'required_skills': "\n".join(required) + "\n",
+        'preferred_skills': ", ".join(_skills(rng, 2, 5)) + "\n",
+        'responsibilities': "\n".join(
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(required)}" for _ in range(rng.randint(3, 6))
+        ) + "\n",
+        'soft_skills': ", ".join(rng.sample(("Takım Çalışması", "Etkili İletişim", "Problem Çözme", "Aktif Dinleme"), 2)) + "\n",
+        'benefits': "Private health insurance, meal card, hybrid work\n",
+    }
+
+def job_text(seed: int) -> str:
+    rng = random.Random(seed + 2_000_003)
+    parts = []
+    for section, body in job_sections(seed).items():
+        parts.append(_header(rng, JOB_SECTION_HEADERS[section]))
+        parts.append(body.rstrip("\n"))
+    return "\n".join(parts) + "\n"
+
+def _pdf_escape(line: str) -> bytes:
+    # Standart Helvetica WinAnsi kodlamasıdır; kodlanamayan (ör. "ı", "ş") karakterler "?" olur
+    data = line.encode('cp1252', errors='replace')
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def pdf_bytes(text: str, lines_per_page: int = 50) -> bytes:
+    """
+    Harici kütüphane kullanmadan, her satırı ayrı metin satırı olan basit bir PDF üretir.
+    """
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects: List[bytes] = []
+    # 1: katalog, 2: sayfa ağacı, 3: font; ardından her sayfa için (sayfa, içerik) çifti
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(pages)))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    for pid, page_lines in zip(page_ids, pages):
+        stream = b"BT /F1 10 Tf 12 TL 50 800 Td\n" + b"".join(
+            b"(" + _pdf_escape(line) + b") Tj T*\n" for line in page_lines
+        ) + b"ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (pid + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def write_document(text: str, path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pdf':
+        with open(path, 'wb') as f:
+            f.write(pdf_bytes(text))
+    elif ext == '.docx':
+        import docx
+        document = docx.Document()
+        for line in text.splitlines():
+            document.add_paragraph(line)
+        document.save(path)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return path
+
+def generate_corpus(directory: str, count: int, formats: Tuple[str, ...] = ("txt", "docx", "pdf"),
+                    seed: int = 0) -> List[str]:
+    """
+    directory altına count adet CV yazar; formatlar sırayla dönüşümlü kullanılır.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        paths.append(write_document(cv_text(seed + i), os.path.join(directory, f"cv_{seed + i:06d}.{fmt}")))
+    return paths
@@ -0,0 +1,925 @@
+import random
+import string
+from cv_job_matcher.matching.keyword_index import KeywordIndex
+from cv_job_matcher.matching.matcher import (
+    NORMALIZED_KEYWORDS, KEYWORD_INDEX, CVIndex, find_best_keyword_match, normalize_keyword
+)
+
+def _mutations(word, rng):
+    # Yazım hatası benzeri varyasyonlar: silme, ekleme, değiştirme, yer değiştirme
+    letters = string.ascii_lowercase + string.digits
+    out = [word, word[:-1], word[1:], word + rng.choice(letters)]
+    if len(word) > 2:
+        i = rng.randrange(len(word) - 1)
+        out.append(word[:i] + word[i + 1] + word[i] + word[i + 2:])
+        out.append(word[:i] + rng.choice(letters) + word[i + 1:])
+    return out
+
+def _sample_words():
+    rng = random.Random(0)
+    words = set()
+    for kw in NORMALIZED_KEYWORDS:
+        words.update(_mutations(kw, rng))
+    for _ in range(300):
+        length = rng.randint(2, 25)
+        words.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(length)))
+    posting = (
+        "Python, Django ve React.js ile deneyim; Docker/Kubernetes bilgisi; "
+        "REST API geliştirme, PostgreSQL, takım çalışması, problem çözme, CI-CD"
+    )
+    for token in posting.replace('/', ',').replace(';', ',').split(','):
+        words.add(normalize_keyword(token.strip()))
+    return sorted(w for w in words if w)
+
+def test_keyword_index_matches_linear_scan():
+    words = _sample_words()
+    for threshold, step in ((0.8, 1), (0.6, 4), (0.9, 4)):
+        index = KeywordIndex(NORMALIZED_KEYWORDS)
+        for word in words[::step]:
+            expected = find_best_keyword_match(word, NORMALIZED_KEYWORDS, threshold)
+            assert index.best_match(word, threshold) == expected, (word, threshold)
+
+def test_keyword_index_exact_hit():
+    for kw in NORMALIZED_KEYWORDS:
+        assert KEYWORD_INDEX.best_match(kw, 0.8) == kw
+
+def _reference_score(keyword, cv_sections, threshold=0.8):
+    # Eski (her anahtar kelimede CV'yi yeniden bölen) puanlamanın birebir kopyası
+    import re
+    def found(text):
+        words = [normalize_keyword(w) for w in re.split(r'[\,\n;•\-]', text)]
+        return find_best_keyword_match(normalize_keyword(keyword), words, threshold) is not None
+    score = 0
+    if found(cv_sections.get('skills', '')):
+        score = 3
+    if found(cv_sections.get('work_and_employment', '')):
+        score = 5
+    for sec in ['education_and_training', 'misc', 'accomplishments']:
+        if found(cv_sections.get(sec, '')):
+            score = max(score, 2)
+    if score == 0 and any(found(cv_sections.get(sec, '')) for sec in cv_sections):
+        score = 1
+    return score
+
+def test_cv_index_scores_match_reference():
+    cv_sections = {
+        'general': 'Ayşe Yılmaz\nistanbul\n',
+        'skills': 'Python, Djangoo, Docker\nReactjs; Git\n',
+        'work_and_employment': 'Backend developer - Flask\nPostgreSQL; Kubernetes\nDocker\n',
+        'education_and_training': 'Bilgisayar Mühendisliği\nScrum sertifikası\n',
+        'misc': 'Jira, Confluence\n',
+        'objective': 'Takım çalışması\nGraphQL\n',
+    }
+    for kw in NORMALIZED_KEYWORDS:
+        expected = _reference_score(kw, cv_sections)
+        assert CVIndex(cv_sections).score(kw) == expected, kw
+    assert CVIndex({}).score('python') == 0
+
+def test_rank_candidates_matches_match_and_score():
+    import pytest
+    pytest.importorskip('numpy')
+    from cv_job_matcher.matching.matcher import match_and_score
+    from cv_job_matcher.matching.ranker import rank_candidates
+    job_sections = {
+        'required_skills': 'Python\nDjango, Docker\nPostgreSQL; Kubernetes\nGit\n',
+        'soft_skills': 'Takım Çalışması\nProblem Çözme\n',
+    }
+    cvs = {
+        'a': {'skills': 'Python, Docker\n', 'work_and_employment': 'Django\nGit\n'},
+        'b': {'skills': 'Pythn\n', 'misc': 'Kubernetes\n', 'general': 'Postgresql\n'},
+        'c': {'general': 'Java\n'},
+        'd': {'work_and_employment': 'Python - Django - Docker\nPostgreSQL, Kubernetes, Git\n'},
+    }
+    result = rank_candidates(job_sections, cvs, top_k=len(cvs))
+    expected = {cv_id: match_and_score(job_sections, sections) for cv_id, sections in cvs.items()}
+    assert [c['cv_id'] for c in result['candidates']] == ['d', 'a', 'b', 'c']
+    for candidate in result['candidates']:
+        total, keyword_scores = expected[candidate['cv_id']]
+        assert candidate['total_score'] == total
+        assert candidate['keyword_scores'] == keyword_scores
+
+def test_corpus_rank_ignores_cvs_added_after_snapshot():
+    from cv_job_matcher.matching.ranker import CVCorpus
+    corpus = CVCorpus()
+    corpus.add('a', {'skills': 'Python\n'})
+    corpus.add('b', {'work_and_employment': 'Python\n'})
+    mask_matrix = corpus.mask_matrix
+
+    def add_after_snapshot(keywords):
+        # /upload_cv'nin sıralama sürerken CV eklemesini taklit eder
+        result = mask_matrix(keywords)
+        corpus.add('c', {'work_and_employment': 'Python, Docker\n'})
+        return result
+
+    corpus.mask_matrix = add_after_snapshot
+    ranking = corpus.rank(['python'], top_k=5, cv_ids=['a', 'b', 'c'])
+    assert [c['cv_id'] for c in ranking] == ['b', 'a']
+    del corpus.mask_matrix
+    assert [c['cv_id'] for c in corpus.rank(['python'], top_k=5)] == ['b', 'c', 'a']
+
+def test_corpus_evicts_oldest_cvs_beyond_cap():
+    from cv_job_matcher.matching.ranker import CVCorpus
+    corpus = CVCorpus(max_cvs=10)
+    reference = CVCorpus()
+    cvs = {f"cv{i}": {'skills': 'Python, Docker\n' if i % 2 else 'Python\n'} for i in range(12)}
+    for cv_id, sections in cvs.items():
+        corpus.add(cv_id, sections)
+    # 11. CV'de sınır aşılır; en eski 2 CV (11 - 10 + 10 // 10) çıkarılır, son CV sonra eklenir
+    assert len(corpus) == 10 and 'cv0' not in corpus and 'cv1' not in corpus and 'cv11' in corpus
+    for cv_id in corpus.ids:
+        reference.add(cv_id, cvs[cv_id])
+    keywords = ['python', 'docker']
+    assert corpus.rank(keywords, top_k=20) == reference.rank(keywords, top_k=20)
+    assert corpus.rank(keywords, cv_ids=['cv0', 'cv5', 'cv2']) == reference.rank(keywords, cv_ids=['cv5', 'cv2'])
+
+    mask_matrix = corpus.mask_matrix
+
+    def evict_after_snapshot(keywords):
+        # Sıralama sürerken eklenen CV'ler eski satırları kaydırır
+        result = mask_matrix(keywords)
+        for i in range(12, 15):
+            corpus.add(f"cv{i}", {'skills': 'Docker\n'})
+        return result
+
+    corpus.mask_matrix = evict_after_snapshot
+    ranking = corpus.rank(keywords, cv_ids=['cv3', 'cv11', 'cv12'])
+    assert [c['cv_id'] for c in ranking] == ['cv3', 'cv11']
+
+def test_gemini_client_retries_and_limits_concurrency():
+    import asyncio
+    import pytest
+    httpx = pytest.importorskip('httpx')
+    pytest.importorskip('fastapi')
+    from cv_job_matcher.llm.gemini_client import GeminiClient
+    from cv_job_matcher.tests.gemini_stub import GeminiStub
+
+    stub = GeminiStub(latency=0.01, fail_first=2)
+    client = GeminiClient(base_url="http://stub", api_key="test", max_retries=3, max_concurrency=4,
+                          backoff_base=0, transport=httpx.ASGITransport(app=stub.app))
+    payload = {"contents": [{"role": "user", "parts": [{"text": "prompt"}]}]}
+
+    async def run():
+        try:
+            return await asyncio.gather(*[client.generate(payload) for _ in range(20)])
+        finally:
+            await client.aclose()
+
+    responses = asyncio.run(run())
+    assert len(responses) == 20
+    assert all(r["candidates"] for r in responses)
+    assert stub.calls == 22
+    assert stub.max_in_flight <= 4
+
+def test_llm_cache_coalesces_concurrent_requests():
+    import asyncio
+    from cv_job_matcher.llm.response_cache import LLMResponseCache, HIT, MISS, COALESCED
+    calls = []
+
+    async def fake_call(payload):
+        calls.append(payload)
+        await asyncio.sleep(0.01)
+        return {"total_score": 42}
+
+    cache = LLMResponseCache(max_entries=8, ttl=60)
+    payload = {"contents": [{"role": "user", "parts": [{"text": "prompt"}]}]}
+
+    async def run():
+        first = await asyncio.gather(*[cache.get_or_call(payload, fake_call) for _ in range(5)])
+        second = await cache.get_or_call(payload, fake_call)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(status for _, status in first) == [COALESCED] * 4 + [MISS]
+    assert all(result == {"total_score": 42} for result, _ in first)
+    assert second == ({"total_score": 42}, HIT)
+
+def test_cascade_match_skips_llm_below_threshold():
+    import asyncio
+    from cv_job_matcher.matching.cascade import cascade_match, LOCAL_TIER, LLM_TIER
+    calls = []
+
+    async def fake_llm(payload):
+        calls.append(payload)
+        return {"total_score": 80}, "MISS"
+
+    job_sections = {'required_skills': 'Python\nDjango\nDocker\nKubernetes\n'}
+    weak_cv = {'skills': 'Excel\n'}
+    strong_cv = {'skills': 'Python, Docker\n', 'work_and_employment': 'Django\nKubernetes\n'}
+    weak = asyncio.run(cascade_match(job_sections, weak_cv, 0.3, fake_llm))
+    strong = asyncio.run(cascade_match(job_sections, strong_cv, 0.3, fake_llm))
+    assert weak["tier"] == LOCAL_TIER and not weak["shortlisted"]
+    assert strong["tier"] == LLM_TIER and strong["llm"] == {"total_score": 80}
+    assert len(calls) == 1
+
+def test_cascade_rank_extracts_job_keywords_once(monkeypatch):
+    import asyncio
+    from cv_job_matcher import config
+    from cv_job_matcher.matching import matcher
+    from cv_job_matcher.matching.cascade import cascade_rank, LLM_TIER
+    from cv_job_matcher.matching.ranker import rank_candidates
+
+    async def fake_llm(payload):
+        return {"total_score": 80}, "MISS"
+
+    job_sections = {'required_skills': 'Python\nDjango\n'}
+    cvs = {cv_id: {'skills': 'Python, Django\n'} for cv_id in ('a', 'b', 'c')}
+    ranking = rank_candidates(job_sections, cvs, top_k=3)
+    calls = []
+    extract = matcher.extract_keywords_from_job
+
+    def counting_extract(*args, **kwargs):
+        calls.append(args)
+        return extract(*args, **kwargs)
+    monkeypatch.setattr(matcher, 'extract_keywords_from_job', counting_extract)
+    monkeypatch.setattr(config, 'PROMPT_COMPACT', True)
+    ranking = asyncio.run(cascade_rank(job_sections, ranking, cvs, 0.1, 3, fake_llm))
+    assert [c['tier'] for c in ranking['candidates']] == [LLM_TIER] * 3
+    assert len(calls) == 1
+
+def test_worker_pool_rejects_when_queue_full():
+    import asyncio
+    import threading
+    import pytest
+    from cv_job_matcher.utils.worker_pool import BoundedWorkerPool, PoolSaturated
+    pool = BoundedWorkerPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(pool.run(release.wait))
+        second = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["running"] == 1 and pool.stats()["queue_depth"] == 1
+        with pytest.raises(PoolSaturated):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(first, second)
+
+    try:
+        asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert pool.stats()["completed"] == 2 and pool.stats()["rejected"] == 1
+
+def test_worker_pool_keeps_slot_until_cancelled_job_finishes():
+    import asyncio
+    import threading
+    import pytest
+    from cv_job_matcher.utils.worker_pool import BoundedWorkerPool, PoolSaturated
+    pool = BoundedWorkerPool(max_workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        release.wait(5)
+
+    async def run():
+        task = asyncio.ensure_future(pool.run(job))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # İş hâlâ çalıştığından slot bırakılmamış olmalı
+        assert pool.stats()["running"] == 1
+        with pytest.raises(PoolSaturated):
+            pool.submit(job)
+        release.set()
+
+    try:
+        asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert pool.stats()["running"] == 0 and pool.stats()["completed"] == 1
+
+class _AliasEncoder:
+    # Deterministik sahte model: eş anlamlılar aynı vektöre, diğer ifadeler rastgele vektörlere gider
+    ALIASES = {'react': 'reactjs', 'k8s': 'kubernetesk8s', 'kubernetes': 'kubernetesk8s'}
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        import hashlib
+        import numpy as np
+        self.encoded.extend(texts)
+        rows = []
+        for text in texts:
+            key = normalize_keyword(text)
+            key = self.ALIASES.get(key, key)
+            seed = int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16)
+            v = np.random.default_rng(seed).standard_normal(64).astype(np.float32)
+            rows.append(v / np.linalg.norm(v))
+        return np.array(rows)
+
+def test_embedding_skill_engine_uses_memmapped_matrix(tmp_path, monkeypatch):
+    import pytest
+    np = pytest.importorskip('numpy')
+    from cv_job_matcher.extractors import skill_extractor
+    from cv_job_matcher.matching.matcher import KEYWORD_MAP, extract_keywords_from_job
+
+    encoder = _AliasEncoder()
+    monkeypatch.setattr(skill_extractor, 'get_model', lambda model_name=None: encoder)
+    extractor = skill_extractor.SkillExtractor(KEYWORD_MAP, matrix_dir=str(tmp_path))
+    monkeypatch.setattr(skill_extractor, '_extractor', extractor)
+
+    job = {'required_skills': 'Proficient in React, K8s\nPython'}
+    assert {'reactjs', 'kubernetesk8s', 'python'} <= set(extract_keywords_from_job(job, engine='embedding'))
+    assert 'kubernetesk8s' not in extract_keywords_from_job(job, engine='lexical')
+
+    cv_index = CVIndex({'skills': 'React\n', 'work_and_employment': 'Ran a K8s cluster\n'}, engine='embedding')
+    assert cv_index.score('React.js') == 3
+    assert cv_index.score('Kubernetes (K8s)') == 5
+    assert cv_index.score('Java') == 0
+
+    # İkinci açılışta KEYWORDS tekrar encode edilmez, matris diskten memory-map edilir
+    encoder.encoded.clear()
+    reloaded = skill_extractor.SkillExtractor(KEYWORD_MAP, matrix_dir=str(tmp_path))
+    assert isinstance(reloaded.matrix(), np.memmap)
+    assert encoder.encoded == []
+    assert np.allclose(reloaded.matrix(), extractor.matrix())
+
+def test_vector_store_ivf_matches_exact_and_survives_reload(tmp_path):
+    import pytest
+    np = pytest.importorskip('numpy')
+    from cv_job_matcher.matching.vector_index import VectorStore
+
+    rng = np.random.default_rng(0)
+    dim = 16
+    centers = rng.standard_normal((12, dim))
+    vectors = centers[rng.integers(0, 12, 600)] + 0.05 * rng.standard_normal((600, dim))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    store = VectorStore(str(tmp_path), dim, ivf_min_rows=10 ** 9)
+    for i, vector in enumerate(vectors):
+        assert store.add(f"cv{i}", vector)
+    assert not store.add("cv0", vectors[0])
+
+    queries = vectors[::50]
+    exact = [store.search(q, 5, mode="exact") for q in queries]
+    assert all(results[0][0] == f"cv{i * 50}" and used == "exact" for i, (results, _, used) in enumerate(exact))
+    store.train(nlist=12)
+    for q, (expected, _, _) in zip(queries, exact):
+        results, searched, used = store.search(q, 5, nprobe=3)
+        assert used == "ivf" and searched < len(store)
+        assert [cv_id for cv_id, _ in results] == [cv_id for cv_id, _ in expected]
+    store.close()
+
+    # Yarım kalmış bir ekleme (kesik vektör ve satır sonu olmayan kimlik) açılışta kırpılır
+    with open(tmp_path / "vectors.f32", 'ab') as f:
+        f.write(b"\x00" * 7)
+    with open(tmp_path / "ids.txt", 'a', encoding='utf-8') as f:
+        f.write("partial")
+    reloaded = VectorStore(str(tmp_path), dim)
+    assert len(reloaded) == 600 and reloaded.trained
+    assert reloaded.add("new", vectors[7])
+    results, _, _ = reloaded.search(vectors[7], 2, mode="ivf")
+    assert {cv_id for cv_id, _ in results} == {"cv7", "new"}
+    reloaded.close()
+
+def test_synthetic_corpus_is_deterministic_and_parseable(tmp_path):
+    from cv_job_matcher.parsers.cv_parser import SECTION_HEADERS, parse_docx, parse_pdf, parse_txt
+    from cv_job_matcher.tests import synthetic
+
+    assert synthetic.cv_text(3) == synthetic.cv_text(3) and synthetic.cv_text(3) != synthetic.cv_text(4)
+    assert synthetic.job_sections(3) == synthetic.job_sections(3)
+    headers = {h.lower().rstrip(':') for values in SECTION_HEADERS.values() for h in values}
+    assert any(line.lower().rstrip(':') in headers for line in synthetic.cv_text(3).splitlines())
+
+    paths = synthetic.generate_corpus(str(tmp_path), 3, seed=3)
+    assert parse_txt(paths[0]) == synthetic.cv_text(3)
+    assert parse_docx(paths[1]).strip() == synthetic.cv_text(4).strip()
+    pdf_text = parse_pdf(paths[2])
+    assert all(line.split()[0] in pdf_text for line in synthetic.cv_text(5).splitlines() if line.isascii())
+
+def test_benchmarks_within_baseline():
+    import os
+    import pytest
+    if os.getenv("CVM_BENCHMARK") != "1":
+        pytest.skip("set CVM_BENCHMARK=1 to run the benchmark suite")
+    from cv_job_matcher.tests.benchmarks import check
+    assert check() == []
+
+def test_benchmark_compare_reports_missing_baselines():
+    from cv_job_matcher.tests.benchmarks import compare, missing_baselines
+    baselines = {"tolerance": 0.3, "benchmarks": {
+        "fast": {"throughput": 100.0, "p95_ms": 10.0},
+        "noisy": {"throughput": 100.0, "p95_ms": 10.0, "tolerance": 0.5},
+    }}
+    results = {
+        "fast": {"throughput": 60.0, "p95_ms": 12.0},
+        "noisy": {"throughput": 60.0, "p95_ms": 14.0},
+        "new": {"throughput": 1.0, "p95_ms": 1.0},
+        "needs_model": {"skipped": "sentence_transformers is not installed"},
+    }
+    regressions = compare(results, baselines)
+    assert len(regressions) == 1 and regressions[0].startswith("fast: throughput")
+    assert missing_baselines(results, baselines) == ["new"]
+
+def test_metrics_spans_trace_and_render(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from cv_job_matcher import config
+    from cv_job_matcher.utils import metrics
+
+    monkeypatch.setattr(config, "METRICS_ENABLED", True)
+    trace, token = metrics.start_trace()
+    with metrics.span("test_stage"):
+        pass
+    assert list(metrics.timed_iter(iter([1, 2]), "test_iter")) == [1, 2]
+    metrics.end_trace(token)
+    assert set(trace) == {"test_stage", "test_iter"}
+    text = metrics.render()
+    assert 'cvm_stage_duration_seconds_bucket{stage="test_stage",le="+Inf"} 1' in text
+    assert 'cvm_stage_duration_seconds_count{stage="test_iter"} 3' in text
+
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware, slow_seconds=0)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        with metrics.span("test_handler"):
+            return {"id": item_id}
+
+    client = TestClient(app)
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200
+    assert client.get("/missing").status_code == 404
+    text = metrics.render()
+    assert 'cvm_http_requests_total{method="GET",path="/items/{item_id}",status="200"} 2' in text
+    assert 'path="unmatched",status="404"' in text
+
+    monkeypatch.setattr(config, "METRICS_ENABLED", False)
+    assert metrics.span("test_stage") is metrics.span("other_stage")
+
+def test_ready_waits_for_warmup(monkeypatch):
+    import subprocess
+    import sys
+    import threading
+    import time
+    from fastapi.testclient import TestClient
+    from cv_job_matcher import config, main
+
+    # Ağır bağımlılıklar uygulama import edilirken değil, ilk kullanımda yüklenir
+    heavy = ('sentence_transformers', 'torch', 'pdfplumber', 'docx')
+    loaded = subprocess.run(
+        [sys.executable, '-c', f'import sys, cv_job_matcher.main; print([m for m in {heavy!r} if m in sys.modules])'],
+        capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert loaded == '[]'
+
+    release = threading.Event()
+    monkeypatch.setattr(config, "PRELOAD_MODELS", True)
+    monkeypatch.setattr(main, "warmup", lambda: release.wait(5))
+    monkeypatch.setattr(main, "_warmup_state", {"ready": False, "error": None, "seconds": None})
+    closed = []
+    monkeypatch.setattr(main, "shutdown_parse_pool", lambda: closed.append("pool"))
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 503
+        release.set()
+        for _ in range(100):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.01)
+        assert client.get("/ready").json()["ready"] is True
+        assert not closed
+    # Lifespan kapanırken havuz da kapatılır
+    assert closed == ["pool"]
+
+def test_parse_cv_adds_cv_id_to_legacy_cache_entries(tmp_path, monkeypatch):
+    from cv_job_matcher.parsers import cv_parser
+    from cv_job_matcher.utils.parse_cache import ParseCache, file_digest
+
+    class _Classifier:
+        fingerprint = "fp"
+
+    path = tmp_path / "cv.txt"
+    path.write_text("Python\n", encoding="utf-8")
+    digest = file_digest(str(path))
+    cache = ParseCache(db_path=str(tmp_path / "cache.db"))
+    monkeypatch.setattr(cv_parser, 'get_parse_cache', lambda: cache)
+    monkeypatch.setattr(cv_parser, 'get_header_classifier', lambda *args, **kwargs: _Classifier())
+    # cv_id alanı eklenmeden önceki sürümün yazdığı kayıt
+    cache.put('cv', digest, cv_parser.cv_fingerprint(), {'raw_text': "Python\n", 'sections': {'general': "Python\n"}})
+    result = cv_parser.parse_cv(str(path))
+    assert result['cv_id'] == digest and result['sections'] == {'general': "Python\n"}
+
+class _OffLoopExtractor:
+    """
+    Embedding SkillExtractor yerine geçer; event loop thread'inde çağrılırsa hata verir.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def _check(self):
+        import asyncio
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.calls += 1
+            return
+        raise AssertionError("skill extractor called on the event loop")
+
+    def extract(self, texts, threshold=None):
+        self._check()
+        return {'python'}
+
+    def extract_sections(self, sections, threshold=None):
+        self._check()
+        return {section: {'python'} for section in sections}
+
+def test_embedding_engine_runs_off_the_event_loop(monkeypatch):
+    import asyncio
+    from fastapi.testclient import TestClient
+    from cv_job_matcher import config, main
+    from cv_job_matcher.matching import matcher, ranker
+
+    extractor = _OffLoopExtractor()
+    monkeypatch.setattr(matcher, 'load_skill_extractor', lambda: extractor)
+    monkeypatch.setattr(ranker, 'load_skill_extractor', lambda: extractor)
+    monkeypatch.setattr(config, 'SKILL_ENGINE', 'embedding')
+    monkeypatch.setattr(config, 'PROMPT_COMPACT', True)
+    monkeypatch.setattr(config, 'PRELOAD_MODELS', False)
+    monkeypatch.setattr(ranker, '_corpus', ranker.CVCorpus())
+
+    asyncio.run(main._add_to_corpus({'a': {'skills': 'Python\n'}}))
+    assert 'a' in ranker.get_cv_corpus() and extractor.calls == 1
+
+    async def fake_llm(payload):
+        return {"ok": True}, "MISS"
+    monkeypatch.setattr(main, 'call_gemini_flash_api_cached', fake_llm)
+    with TestClient(main.app) as client:
+        body = {'job_sections': {'required_skills': 'Python\n'}, 'cv_sections': {'skills': 'Python\n'}}
+        response = client.post('/match', json=dict(body, mode='llm'))
+        assert response.status_code == 200 and response.json() == {"ok": True}
+    assert extractor.calls == 2
+
+    from cv_job_matcher.matching.cascade import cascade_match
+    result = asyncio.run(cascade_match(body['job_sections'], body['cv_sections'], 0.0, fake_llm))
+    # local_screen: ilan + CV, kompakt prompt: ilan
+    assert result['llm'] == {"ok": True} and extractor.calls == 5
+
+def test_upload_streaming_hash_limit_and_cleanup(tmp_path, monkeypatch):
+    import asyncio
+    import hashlib
+    import io
+    import os
+    import pytest
+    from fastapi import HTTPException
+    from starlette.datastructures import UploadFile
+    from cv_job_matcher import config
+    from cv_job_matcher.utils import file_utils
+
+    monkeypatch.setattr(config, 'UPLOAD_DIR', str(tmp_path))
+    data = os.urandom(300_000)
+
+    def upload():
+        return UploadFile(file=io.BytesIO(data), filename="cv.pdf")
+
+    # Hash yüklemenin kendi dosyası üzerinde hesaplanır, içerik kopyalanmaz
+    source = upload()
+    file, digest = asyncio.run(file_utils.hash_upload_file(source, max_size=10**6))
+    assert file is source.file and digest == hashlib.sha256(data).hexdigest() and file.read() == data
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(file_utils.hash_upload_file(upload(), max_size=100_000))
+    assert exc.value.status_code == 413
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(file_utils.save_upload_file(upload(), str(tmp_path), max_size=100_000))
+    assert exc.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+    path, digest = asyncio.run(file_utils.save_upload_file(upload(), str(tmp_path), max_size=10**6))
+    assert digest == hashlib.sha256(data).hexdigest() and open(path, 'rb').read() == data
+
+def test_upload_limit_rejects_before_form_parsing():
+    from fastapi import FastAPI, File, UploadFile
+    from fastapi.testclient import TestClient
+    from cv_job_matcher.utils.file_utils import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware
+
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, paths=("/upload",), max_size=1000)
+    handled = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        handled.append(file.filename)
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("a.txt", b"x" * 100)}).status_code == 200
+    too_large = b"x" * (1000 + MULTIPART_OVERHEAD_BYTES + 1)
+    response = client.post("/upload", files={"file": ("b.txt", too_large)})
+    assert response.status_code == 413
+    # Content-Length olmadan (chunked) gönderilen gövde de okunurken kesilir
+    body = (b'--bnd\r\nContent-Disposition: form-data; name="file"; filename="c.txt"\r\n\r\n'
+            + too_large + b'\r\n--bnd--\r\n')
+    chunks = (body[i:i + 8192] for i in range(0, len(body), 8192))
+    response = client.post("/upload", content=chunks, headers={"content-type": "multipart/form-data; boundary=bnd"})
+    assert response.status_code == 413
+    assert handled == ["a.txt"]
+
+def test_compact_prompt_sections_keywords_and_budget(caplog):
+    import hashlib
+    from cv_job_matcher.keywords import KEYWORDS
+    from cv_job_matcher.matching.matcher import (
+        COMPACT_MIN_SECTION_CHARS, _trim_sections, build_gemini_prompt, estimate_tokens
+    )
+
+    job = {'position': 'Senior Backend Developer\n', 'required_skills': 'Python\nDjango\n', 'benefits': 'Meal card\n'}
+    cv = {'skills': 'Python, Docker\n', 'work_and_employment': 'Backend Developer - Getir (2019 - Present)\n'}
+    # Kompakt olmayan prompt bu özellikten önceki sürümle bayt bayt aynıdır
+    legacy = build_gemini_prompt(job, cv, ['Python', 'Django'])
+    assert hashlib.sha256(legacy.encode('utf-8')).hexdigest() == (
+        "16ba09229496a78100b1a541a1ac3b1fe853a249f2a254a9ca735abd43fa1cf5"
+    )
+
+    prompt = build_gemini_prompt(dict(job, about_company='Acme\n', mission=' \n'), cv, compact=True)
+    assert "[position]\nSenior Backend Developer" in prompt and "[skills]\nPython, Docker" in prompt
+    assert "Meal card" not in prompt and "[about_company]" not in prompt and "[mission]" not in prompt
+    keyword_line = prompt[prompt.index("Keywords:\n") + len("Keywords:\n"):].split("\n", 1)[0]
+    assert keyword_line == "Django, Python"
+    # İlanda tanınan anahtar kelime yoksa tüm liste gönderilir
+    fallback = build_gemini_prompt({'position': 'Manager\n'}, cv, compact=True)
+    assert ", ".join(KEYWORDS) in fallback
+
+    sections = [('a', 'short\n'), ('b', 'line one\nline two\nline three\n' * 20), ('c', 'x' * 1000)]
+    trimmed = dict(_trim_sections(sections, 300))
+    assert trimmed['a'] == 'short\n'
+    assert sum(len(text) for text in trimmed.values()) <= 300
+    # Uzun bölüm satır ortasında değil satır sonunda kesilir
+    assert trimmed['b'].split('\n')[-1] in ('line one', 'line two', 'line three')
+    assert len(trimmed['c']) == (300 - len('short\n')) // 2
+    assert _trim_sections(sections[:1], 300) == sections[:1]
+
+    # Sabit kısım bütçeyi aşsa bile bölümler boşaltılmaz, durum loglanır
+    long_cv = {'skills': 'Python, Docker\n' * 100, 'work_and_employment': 'Backend work\n' * 100}
+    with caplog.at_level('WARNING', logger='cv_job_matcher.matcher'):
+        tight = build_gemini_prompt(job, long_cv, compact=True, token_budget=400)
+    assert estimate_tokens(tight) > 400 and "over the 400 token budget" in caplog.text
+    skills = tight[tight.index("[skills]\n") + len("[skills]\n"):tight.index("[work_and_employment]")]
+    assert COMPACT_MIN_SECTION_CHARS // 2 < len(skills) <= COMPACT_MIN_SECTION_CHARS + 1
+    roomy = build_gemini_prompt(job, long_cv, compact=True, token_budget=5000)
+    assert estimate_tokens(roomy) <= 5000 and "Backend work" in roomy
+
+class _CountingHeaderEncoder(_AliasEncoder):
+    ALIASES = {'placesiworked': 'workexperience', 'mytoolbox': 'skills'}
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return super().encode(texts, **kwargs)
+
+def _per_line_sections(text, section_headers, encoder, threshold):
+    # user-002 öncesi find_header_with_transformer mantığı: her satır ayrı encode edilir
+    import numpy as np
+    all_headers = [h for headers in section_headers.values() for h in headers]
+    header_to_section = {h.lower(): section for section, headers in section_headers.items() for h in headers}
+    sections = {"general": ""}
+    current_section = "general"
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        scores = encoder.encode(all_headers) @ encoder.encode([line])[0]
+        best_idx = int(np.argmax(scores))
+        if scores[best_idx] >= threshold:
+            current_section = header_to_section.get(all_headers[best_idx].lower(), all_headers[best_idx])
+            sections.setdefault(current_section, "")
+        else:
+            sections[current_section] += line + "\n"
+    return sections
+
+def test_header_classifier_batches_and_matches_per_line_logic(monkeypatch):
+    from cv_job_matcher.parsers import header_classifier
+    from cv_job_matcher.parsers.cv_parser import SECTION_HEADERS
+
+    encoder = _CountingHeaderEncoder()
+    monkeypatch.setattr(header_classifier, 'get_model', lambda model_name=None: encoder)
+    classifier = header_classifier.HeaderClassifier(SECTION_HEADERS)
+    long_line = "Built and operated the payment platform " + "with a small team " * 8
+    text = "\n".join([
+        "Ayse Yilmaz", "Work Experience:", "Backend Developer at Getir", long_line,
+        "Places I Worked", "Freelance mobile apps", "EDUCATION", "Bogazici University",
+        "My Toolbox", "Python, Docker", "",
+    ])
+    sections = header_classifier.split_sections(text, classifier, 0.7)
+    # Başlık tablosu için bir, doküman için bir encode çağrısı
+    assert encoder.calls == 2
+    assert "Work Experience:" not in encoder.encoded and "EDUCATION" not in encoder.encoded
+    assert long_line.strip() not in encoder.encoded
+    assert "Places I Worked" in encoder.encoded and "My Toolbox" in encoder.encoded
+    assert sections == _per_line_sections(text, SECTION_HEADERS, _CountingHeaderEncoder(), 0.7)
+    assert sections['skills'] == "Python, Docker\n"
+    assert "Freelance mobile apps" in sections['work_and_employment']
+
+    header_classifier.split_sections("Skills\nGo, Rust\n", classifier, 0.7)
+    assert encoder.calls == 3
+
+def test_parse_cache_lru_disk_tier_and_invalidation(tmp_path):
+    import sqlite3
+    from cv_job_matcher.utils.parse_cache import ParseCache
+
+    db_path = str(tmp_path / "parse_cache.db")
+    cache = ParseCache(max_entries=2, db_path=db_path)
+    for digest in ("a", "b", "c"):
+        cache.put('cv', digest, "fp1", {'sections': {'skills': digest}})
+    # LRU sınırı: en eski kayıt bellekten düşer ama diskten okunur
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get('cv', "a", "fp1") == {'sections': {'skills': "a"}}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get('cv', "c", "fp1") is not None
+    assert cache.stats()["memory_hits"] == 1
+    # "a" diskten okununca belleğe geri alındı, sıradaki en eski "b" düştü
+    assert [key[1] for key in cache._memory] == ["a", "c"]
+
+    # get() derin kopya döner, sonucu değiştirmek önbelleği bozmaz
+    cached = cache.get('cv', "c", "fp1")
+    cached['sections']['skills'] = "changed"
+    assert cache.get('cv', "c", "fp1")['sections']['skills'] == "c"
+
+    # Aynı veritabanıyla yeni süreç: bellek boş, kayıt diskten gelir
+    reopened = ParseCache(max_entries=2, db_path=db_path)
+    assert reopened.get('cv', "b", "fp1") == {'sections': {'skills': "b"}}
+    assert reopened.stats() == {"memory_hits": 0, "disk_hits": 1, "misses": 0, "memory_entries": 1}
+
+    # Parmak izi değişince kayıt geçersizdir ve diskten silinir
+    assert reopened.get('cv', "a", "fp2") is None
+    assert reopened.get('job', "a", "fp1") is None
+    assert reopened.stats()["misses"] == 2
+    rows = sqlite3.connect(db_path).execute("SELECT kind, digest FROM parse_cache ORDER BY digest").fetchall()
+    assert rows == [('cv', 'b'), ('cv', 'c')]
+
+def test_iter_pdf_pages_none_pages_cap_and_parallel_order(monkeypatch):
+    import pdfplumber
+    from cv_job_matcher.parsers.pdf_extract import iter_pdf_pages
+    from cv_job_matcher.tests.synthetic import pdf_bytes
+
+    text = "\n".join(f"Page {i // 2} line {i % 2}" for i in range(12))
+    data = pdf_bytes(text, lines_per_page=2)
+    pages = list(iter_pdf_pages(data, max_pages=0, workers=0))
+    assert [page.splitlines()[0] for page in pages] == [f"Page {i} line 0" for i in range(6)]
+    assert len(list(iter_pdf_pages(data, max_pages=4, workers=0))) == 4
+
+    # Paralel yol: sayfa grupları process havuzunda çıkarılır ama sırayla teslim edilir
+    parallel = list(iter_pdf_pages(data, max_pages=0, workers=2, parallel_min_pages=1))
+    assert parallel == pages
+    assert len(list(iter_pdf_pages(data, max_pages=5, workers=2, parallel_min_pages=1))) == 5
+
+    # Taranmış/boş sayfada extract_text() None döner; sayfa boş metin olarak gelir
+    extract_text = pdfplumber.page.Page.extract_text
+    monkeypatch.setattr(pdfplumber.page.Page, 'extract_text',
+                        lambda self, **kwargs: None if self.page_number == 2 else extract_text(self, **kwargs))
+    pages = list(iter_pdf_pages(data, max_pages=3, workers=0))
+    assert pages[1] == "" and pages[2].startswith("Page 2")
+
+def test_cv_fingerprint_tracks_pdf_settings(monkeypatch):
+    from cv_job_matcher import config
+    from cv_job_matcher.parsers import cv_parser
+
+    class _Classifier:
+        fingerprint = "fp"
+
+    monkeypatch.setattr(cv_parser, 'get_header_classifier', lambda *args, **kwargs: _Classifier())
+    base = cv_parser.cv_fingerprint()
+    monkeypatch.setattr(config, 'PDF_BACKEND', 'pypdfium2')
+    backend = cv_parser.cv_fingerprint()
+    monkeypatch.setattr(config, 'PDF_MAX_PAGES', 3)
+    assert len({base, backend, cv_parser.cv_fingerprint()}) == 3
+
+def test_batch_ingest_resume_dedupe_and_corrupt_files(tmp_path, monkeypatch, caplog):
+    import json
+    import shutil
+    from cv_job_matcher import batch_ingest, config
+    from cv_job_matcher.parsers import header_classifier
+    from cv_job_matcher.tests import synthetic
+    from cv_job_matcher.utils import model_registry
+
+    encoder = _CountingHeaderEncoder()
+    monkeypatch.setattr(header_classifier, 'get_model', lambda model_name=None: encoder)
+    monkeypatch.setattr(model_registry, 'get_model', lambda model_name=None, device=None: encoder)
+    root = tmp_path / "cvs"
+    paths = synthetic.generate_corpus(str(root), 6, seed=10)
+    shutil.copy(paths[0], root / "duplicate_of_first.txt")
+    (root / "corrupt.pdf").write_bytes(b"%PDF-1.4 this is not a pdf")
+    (root / "notes.md").write_text("unsupported", encoding="utf-8")
+    out = str(tmp_path / "corpus.jsonl")
+    pdf_workers = config.PDF_WORKERS
+
+    with caplog.at_level('INFO', logger='cv_job_matcher.batch_ingest'):
+        stats = batch_ingest.ingest(str(root), out, workers=1, batch_size=2, report_every=0)
+    assert (stats["parsed"], stats["skipped"], stats["errors"]) == (6, 1, 1)
+    assert "corrupt.pdf" in caplog.text and "6 parsed, 1 skipped, 1 errors" in caplog.text
+    assert config.PDF_WORKERS == pdf_workers
+    with open(out, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    with open(out + ".checkpoint", encoding='utf-8') as f:
+        checkpoint = f.read().split()
+    assert len(records) == 6 and sorted(checkpoint) == sorted(r["cv_id"] for r in records)
+    assert all(r["sections"] for r in records)
+
+    # Aynı komut tekrar çalışınca checkpoint'teki her şey atlanır
+    stats = batch_ingest.ingest(str(root), out, workers=1)
+    assert (stats["parsed"], stats["skipped"], stats["errors"]) == (0, 7, 1)
+    with open(out, encoding='utf-8') as f:
+        assert len(f.readlines()) == 6
+
+    # Process havuzu da aynı sonucu üretir
+    stats = batch_ingest.ingest(str(root), str(tmp_path / "pooled.jsonl"), workers=2)
+    assert (stats["parsed"], stats["skipped"], stats["errors"]) == (6, 1, 1)
+
+def test_upload_cv_indexing_is_best_effort(tmp_path, monkeypatch, caplog):
+    import asyncio
+    from concurrent.futures import Future
+    from fastapi.testclient import TestClient
+    from cv_job_matcher import config, main
+    from cv_job_matcher.matching import ranker, vector_index
+    from cv_job_matcher.parsers import cv_parser, header_classifier
+    from cv_job_matcher.utils.parse_cache import ParseCache
+    from cv_job_matcher.utils.worker_pool import PoolSaturated
+
+    class _Pool:
+        kind = "thread"
+
+        def submit(self, fn, *args, **kwargs):
+            if fn is vector_index.embed_sections:
+                raise PoolSaturated("full")
+            future = Future()
+            future.set_result(fn(*args, **kwargs))
+            return future
+
+        async def run(self, fn, *args, **kwargs):
+            return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    class _Index:
+        checked = 0
+
+        def __contains__(self, cv_id):
+            # İndeks dosyaları event loop thread'inde açılmamalı
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self.checked += 1
+                return False
+            raise AssertionError("vector index used on the event loop")
+
+    index = _Index()
+    monkeypatch.setattr(config, 'VECTOR_INDEX_ENABLED', True)
+    monkeypatch.setattr(config, 'PRELOAD_MODELS', False)
+    monkeypatch.setattr(main, 'get_parse_pool', lambda: _Pool())
+    monkeypatch.setattr(main, 'get_cv_vector_index', lambda: index)
+    monkeypatch.setattr(cv_parser, 'get_parse_cache', lambda: ParseCache())
+    monkeypatch.setattr(header_classifier, 'get_model', lambda model_name=None: _CountingHeaderEncoder())
+    monkeypatch.setattr(ranker, '_corpus', ranker.CVCorpus())
+    with TestClient(main.app) as client, caplog.at_level('WARNING', logger='cv_job_matcher'):
+        response = client.post('/upload_cv', files={'file': ('cv.txt', b"Python\n", 'text/plain')})
+    # Havuz dolu olsa da parse sonucu döner, CV sıralama havuzuna eklenir
+    assert response.status_code == 200 and response.json()['sections']
+    assert response.json()['cv_id'] in ranker.get_cv_corpus()
+    assert "not added to the vector index" in caplog.text
+    assert index.checked == 1
+
+def test_metrics_scrape_does_not_create_pool_or_index(monkeypatch):
+    from cv_job_matcher import main  # noqa: F401 (CallbackMetric'leri kaydeder)
+    from cv_job_matcher.llm import response_cache
+    from cv_job_matcher.matching import vector_index
+    from cv_job_matcher.utils import metrics, parse_cache, worker_pool
+
+    for module, name in ((worker_pool, "_pool"), (vector_index, "_index"),
+                         (parse_cache, "_cache"), (response_cache, "_cache")):
+        monkeypatch.setattr(module, name, None)
+    text = metrics.render()
+    assert worker_pool._pool is None and vector_index._index is None
+    assert parse_cache._cache is None and response_cache._cache is None
+    assert "cvm_parse_pool_utilization 0" in text and 'cvm_vector_index_rows{' not in text
+
+def test_model_loaded_once_across_cv_and_job_parsing(tmp_path, monkeypatch):
+    import sys
+    import types
+    from cv_job_matcher.parsers import cv_parser, header_classifier, job_parser
+    from cv_job_matcher.utils import model_registry
+
+    loads = []
+
+    class _FakeSentenceTransformer(_CountingHeaderEncoder):
+        def __init__(self, model_name, device=None):
+            super().__init__()
+            loads.append((model_name, device))
+
+    # Gerçek sentence_transformers yerine yükleme sayısını tutan sahte modül
+    monkeypatch.setitem(sys.modules, 'sentence_transformers',
+                        types.SimpleNamespace(SentenceTransformer=_FakeSentenceTransformer))
+    monkeypatch.setattr(model_registry, '_models', {})
+    monkeypatch.setattr(header_classifier, '_classifiers', {})
+    path = tmp_path / "cv.txt"
+    path.write_text("Places I Worked\nAcme\nMy Toolbox\nPython\n", encoding="utf-8")
+
+    cv = cv_parser.parse_cv(str(path), use_cache=False)
+    job = job_parser.parse_job_posting("My Toolbox\nPython, Docker\n", use_cache=False)
+    cv_parser.parse_cv(str(path), use_cache=False)
+    assert cv['sections'] and job
+    assert len(loads) == 1
+    (model,) = model_registry._models.values()
+    assert model.calls >= 3
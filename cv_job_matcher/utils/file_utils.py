@@ -1,11 +1,138 @@
+import hashlib
+import json
 import os
 import tempfile
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from cv_job_matcher import config
+from cv_job_matcher.utils.metrics import span
 
-async def save_upload_file(upload_file, destination_dir="uploads"):
+# Multipart sınırları ve part başlıkları için dosya boyutuna eklenen pay
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class _BodyTooLarge(Exception):
+    pass
+
+class UploadLimitMiddleware:
+    """
+    Yükleme isteklerinin gövdesini form parse edilmeden önce sınırlar. File(...)
+    parametreli endpoint'lerde Starlette tüm multipart gövdeyi handler çalışmadan
+    okuyup diske yazar; bu yüzden Content-Length sınırı aşıyorsa gövde hiç okunmadan,
+    Content-Length yoksa (chunked) okunan bayt sınırı aştığı anda 413 döner.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_size: Optional[int] = None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_size = config.UPLOAD_MAX_BYTES if max_size is None else max_size
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": f"File exceeds the {self.max_size} byte upload limit"}).encode('utf-8')
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_size or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        limit = self.max_size + MULTIPART_OVERHEAD_BYTES
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            await self._reject(send)
+            return
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            # Sınır aşıldıktan sonra uygulamanın ürettiği (ör. 400) yanıt yerine 413 gönderilir
+            if exceeded:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            await self._reject(send)
+
+def _check_declared_size(upload_file, max_size):
+    # Boyutu biliniyorsa okumaya başlamadan reddet
+    size = getattr(upload_file, "size", None)
+    if max_size and size is not None and size > max_size:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {max_size} byte upload limit")
+
+async def copy_upload(upload_file, out, max_size=None, chunk_size=None) -> str:
+    """
+    Yüklenen dosyayı sabit boyutlu parçalar halinde out'a yazar (out None ise sadece okur)
+    ve bu sırada SHA-256 hash'ini hesaplar. max_size aşılırsa 413 ile durur.
+    """
+    max_size = config.UPLOAD_MAX_BYTES if max_size is None else max_size
+    chunk_size = chunk_size or config.UPLOAD_CHUNK_SIZE
+    _check_declared_size(upload_file, max_size)
+    digest = hashlib.sha256()
+    size = 0
+    with span("upload_save"):
+        while True:
+            chunk = await upload_file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise HTTPException(status_code=413, detail=f"File exceeds the {max_size} byte upload limit")
+            digest.update(chunk)
+            if out is not None:
+                out.write(chunk)
+    return digest.hexdigest()
+
+async def save_upload_file(upload_file, destination_dir=None, max_size=None):
+    """
+    Dosyayı diske akıtarak kaydeder, (dosya yolu, içerik hash'i) döner.
+    Dosyayı işi bitince silmek çağıranın sorumluluğundadır (bkz. remove_file).
+    """
+    destination_dir = destination_dir or config.UPLOAD_DIR
     os.makedirs(destination_dir, exist_ok=True)
     suffix = os.path.splitext(upload_file.filename)[1]
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=destination_dir) as tmp:
-        content = await upload_file.read()
-        tmp.write(content)
         tmp_path = tmp.name
-    return tmp_path
+        try:
+            content_hash = await copy_upload(upload_file, tmp, max_size)
+        except BaseException:
+            tmp.close()
+            remove_file(tmp_path)
+            raise
+    return tmp_path, content_hash
+
+async def hash_upload_file(upload_file, max_size=None):
+    """
+    Starlette yüklemeyi zaten SpooledTemporaryFile'da tutar (küçükler bellekte, büyükler
+    diskte); içerik ikinci kez kopyalanmadan parça parça hash'lenir ve dosya başa sarılır.
+    (dosya nesnesi, içerik hash'i) döner; dosyayı istek bitince Starlette kapatır.
+    """
+    content_hash = await copy_upload(upload_file, None, max_size)
+    await upload_file.seek(0)
+    return upload_file.file, content_hash
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
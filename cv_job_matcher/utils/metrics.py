@@ -0,0 +1,241 @@
+"""
+Aşama süreleri (span), sayaçlar ve Prometheus metin formatında /metrics çıktısı.
+
+    with span("pdf_extract"):
+        ...
+
+Her span hem süreç genelindeki cvm_stage_duration_seconds histogramına hem de
+(varsa) o anki isteğin aşama dökümüne yazılır. CVM_METRICS=0 iken span() paylaşılan
+boş bir context manager döner ve hiçbir ölçüm yapılmaz.
+"""
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from cv_job_matcher import config
+
+logger = logging.getLogger("cv_job_matcher.metrics")
+
+_INF_LABEL = 'le="+Inf"'
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# O anki isteğin aşama -> toplam süre sözlüğü (istek dışında None)
+_trace: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("cvm_trace", default=None)
+_NOOP = contextlib.nullcontext()
+
+_registry: Dict[str, "Metric"] = {}
+_registry_lock = threading.Lock()
+
+def enabled() -> bool:
+    return config.METRICS_ENABLED
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry[name] = self
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiketler -> (kova sayıları, toplam, adet)
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+        lines = []
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, _INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class CallbackMetric(Metric):
+    """
+    Değeri /metrics okunurken fn() ile alınan metrik. Önbellek ve havuz gibi zaten
+    kendi sayaçlarını tutan bileşenler için sıcak yolda hiçbir ek maliyet yoktur.
+    fn, etiket değerleri demeti -> değer sözlüğü döner.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], Dict[tuple, float]],
+                 labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.fn()
+        except Exception:
+            logger.exception("Metric callback %s failed", self.name)
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in values.items()]
+
+STAGE_SECONDS = Histogram("cvm_stage_duration_seconds", "Time spent in each processing stage.", ("stage",))
+REQUEST_SECONDS = Histogram("cvm_http_request_duration_seconds", "HTTP request latency.", ("method", "path"))
+REQUESTS = Counter("cvm_http_requests_total", "HTTP requests by status code.", ("method", "path", "status"))
+LLM_REQUESTS = Counter("cvm_llm_requests_total", "Gemini HTTP attempts by outcome.", ("outcome",))
+LLM_TOKENS = Counter("cvm_llm_tokens_total", "Gemini tokens reported in usageMetadata.", ("type",))
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace[stage] = trace.get(stage, 0.0) + seconds
+
+def span(stage: str):
+    if not config.METRICS_ENABLED:
+        return _NOOP
+    return _Span(stage)
+
+def timed_iter(iterable: Iterable, stage: str) -> Iterator:
+    """
+    Üreticinin her next() çağrısını stage olarak ölçer (ör. sayfa sayfa PDF çıkarımı).
+    """
+    if not config.METRICS_ENABLED:
+        return iter(iterable)
+    return _timed_iter(iter(iterable), stage)
+
+def _timed_iter(iterator: Iterator, stage: str) -> Iterator:
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            record_stage(stage, time.perf_counter() - started)
+            return
+        record_stage(stage, time.perf_counter() - started)
+        yield item
+
+def start_trace() -> Tuple[Dict[str, float], contextvars.Token]:
+    trace: Dict[str, float] = {}
+    return trace, _trace.set(trace)
+
+def end_trace(token: contextvars.Token) -> None:
+    _trace.reset(token)
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+class MetricsMiddleware:
+    """
+    Her HTTP isteği için süre ve durum kodunu kaydeder, istek boyunca aşama
+    dökümünü toplar ve slow_seconds'u aşan istekleri dökümüyle birlikte loglar.
+    Yol etiketi, kardinaliteyi sınırlamak için eşleşen route şablonudur.
+    """
+
+    def __init__(self, app, slow_seconds: Optional[float] = None):
+        self.app = app
+        self.slow_seconds = config.SLOW_REQUEST_SECONDS if slow_seconds is None else slow_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        trace, token = start_trace()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            end_trace(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope.get("method", "")
+            REQUEST_SECONDS.observe(elapsed, method, path)
+            REQUESTS.inc(method, path, str(status[0]))
+            if self.slow_seconds and elapsed >= self.slow_seconds:
+                breakdown = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in
+                                      sorted(trace.items(), key=lambda item: -item[1]))
+                logger.warning("Slow request %s %s: %.1fms status=%d [%s]",
+                               method, scope.get("path", ""), elapsed * 1000, status[0], breakdown)
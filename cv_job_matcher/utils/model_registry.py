@@ -0,0 +1,41 @@
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from cv_job_matcher import config
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Süreç genelinde paylaşılan model kayıt defteri: her (model, cihaz) çifti bir kez yüklenir
+_models: Dict[Tuple[str, Optional[str]], "SentenceTransformer"] = {}
+_lock = threading.Lock()
+
+def get_model(model_name: Optional[str] = None, device: Optional[str] = None) -> "SentenceTransformer":
+    """
+    İstenen SentenceTransformer modelini döner, ilk çağrıda yükler.
+    Birden fazla thread aynı anda çağırsa bile model yalnızca bir kez yüklenir.
+    sentence_transformers (ve torch) modülün import'unda değil, ilk yüklemede import edilir.
+    """
+    model_name = model_name or config.EMBEDDING_MODEL_NAME
+    device = device or config.EMBEDDING_DEVICE
+    key = (model_name, device)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name, device=device)
+            _models[key] = model
+    return model
+
+def preload_models() -> None:
+    # Uygulama başlangıcında varsayılan modeli belleğe al
+    get_model()
+
+def warmup_model(model_name: Optional[str] = None, device: Optional[str] = None) -> None:
+    # İlk inference'ın tek seferlik maliyetleri (kernel seçimi, tokenizer önbelleği) istek yolundan alınır
+    get_model(model_name, device).encode(
+        ["warmup", "Work Experience", "Python, Docker, Kubernetes"],
+        convert_to_numpy=True, normalize_embeddings=True
+    )
@@ -0,0 +1,144 @@
+import copy
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from cv_job_matcher import config
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def content_digest(content) -> str:
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+def _stream_digest(f, chunk_size: int) -> str:
+    h = hashlib.sha256()
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        h.update(chunk)
+    return h.hexdigest()
+
+def file_digest(file_path, chunk_size: int = 1 << 20) -> str:
+    if not isinstance(file_path, (str, os.PathLike)):
+        # Dosya nesnesi: okuduktan sonra eski konumuna geri sar
+        position = file_path.tell()
+        digest = _stream_digest(file_path, chunk_size)
+        file_path.seek(position)
+        return digest
+    with open(file_path, 'rb') as f:
+        return _stream_digest(f, chunk_size)
+
+class ParseCache:
+    """
+    İçerik hash'ine göre anahtarlanan parse sonucu önbelleği.
+    Bellekte sınırlı bir LRU katmanı ve isteğe bağlı kalıcı bir SQLite katmanı vardır.
+    Her kayıt, model ve başlık tablolarından üretilen parmak iziyle (fingerprint)
+    saklanır; parmak izi değişirse kayıt geçersiz sayılır.
+    """
+
+    def __init__(self, max_entries: int = 256, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._memory: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                " kind TEXT NOT NULL, digest TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+                " payload TEXT NOT NULL, embeddings BLOB, created_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, digest))"
+            )
+            self._db.commit()
+
+    def _remember(self, key: tuple, entry: tuple) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, kind: str, digest: str, fingerprint: str) -> Optional[tuple]:
+        key = (kind, digest)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] == fingerprint:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT fingerprint, payload, embeddings FROM parse_cache WHERE kind = ? AND digest = ?",
+                    (kind, digest)
+                ).fetchone()
+                if row is not None:
+                    if row[0] == fingerprint:
+                        entry = (row[0], json.loads(row[1]), row[2])
+                        self._remember(key, entry)
+                        self.disk_hits += 1
+                        return entry
+                    # Model veya başlık tabloları değişmiş, eski kaydı sil
+                    self._db.execute("DELETE FROM parse_cache WHERE kind = ? AND digest = ?", (kind, digest))
+                    self._db.commit()
+            self.misses += 1
+            return None
+
+    def get(self, kind: str, digest: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        entry = self._lookup(kind, digest, fingerprint)
+        if entry is None:
+            return None
+        return copy.deepcopy(entry[1])
+
+    def get_embeddings(self, kind: str, digest: str, fingerprint: str):
+        entry = self._lookup(kind, digest, fingerprint)
+        if entry is None or entry[2] is None:
+            return None
+        import numpy as np
+        return np.load(io.BytesIO(entry[2]), allow_pickle=False)
+
+    def put(self, kind: str, digest: str, fingerprint: str, value: Dict[str, Any], embeddings=None) -> None:
+        blob = None
+        if embeddings is not None:
+            import numpy as np
+            buf = io.BytesIO()
+            np.save(buf, embeddings, allow_pickle=False)
+            blob = buf.getvalue()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember((kind, digest), (fingerprint, value, blob))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO parse_cache (kind, digest, fingerprint, payload, embeddings, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, digest, fingerprint, json.dumps(value, ensure_ascii=False), blob, time.time())
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+def get_parse_cache() -> ParseCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParseCache(config.PARSE_CACHE_SIZE, config.PARSE_CACHE_DB or None)
+    return _cache
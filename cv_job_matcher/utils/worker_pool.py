@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+from cv_job_matcher import config
+from cv_job_matcher.utils.metrics import enabled as metrics_enabled, record_stage
+
+class PoolSaturated(Exception):
+    pass
+
+class BoundedWorkerPool:
+    """
+    CPU yoğun işleri (PDF çıkarımı, transformer inference) event loop dışında
+    çalıştıran sınırlı havuz. Aynı anda en fazla max_workers iş çalışır ve
+    max_queue iş bekler; kuyruk doluysa yeni iş beklemeden PoolSaturated ile reddedilir.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16, kind: str = "thread"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported worker pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        if kind == "process":
+            # Havuz sunucu içinde, model ve tokenizer thread'leri çalışırken açılır;
+            # fork bu durumda kilitlenebildiğinden worker'lar spawn ile başlatılır
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cvm-parse")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(f"Parse queue is full ({self.max_workers} running, {self.max_queue} queued)")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            if kwargs:
+                fn = functools.partial(fn, **kwargs)
+            if self.kind == "thread" and metrics_enabled():
+                future = self._executor.submit(self._traced(fn, args))
+            else:
+                future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._finish(None)
+            raise
+        # Slot ve sayaçlar bekleyen coroutine'e göre değil executor işinin kendisine göre
+        # bırakılır; istek iptal edilse de iş çalıştığı sürece kapasite dolu sayılır
+        future.add_done_callback(self._finish)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _finish(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if future is None or future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+        self._slots.release()
+
+    @staticmethod
+    def _traced(fn, args):
+        # İşçi thread'i isteğin context'iyle çalışır, böylece içindeki span'ler
+        # istek dökümüne yazılır; kuyrukta geçen süre pool_wait olarak kaydedilir
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def call():
+            record_stage("pool_wait", time.perf_counter() - submitted)
+            return fn(*args)
+        return functools.partial(context.run, call)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            # Executor işleri FIFO sırayla aldığından ilk max_workers iş çalışıyordur
+            running = min(self.in_flight, self.max_workers)
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "running": running,
+                "queue_depth": self.in_flight - running,
+                "max_queue": self.max_queue,
+                "utilization": running / self.max_workers,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+_pool: Optional[BoundedWorkerPool] = None
+_pool_lock = threading.Lock()
+
+def get_parse_pool() -> BoundedWorkerPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BoundedWorkerPool(config.PARSE_WORKERS, config.PARSE_QUEUE_SIZE, config.PARSE_POOL_KIND)
+    return _pool
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None